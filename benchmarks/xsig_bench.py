@@ -0,0 +1,347 @@
+"""End-to-end load benchmark for the Crestron XSIG library
+
+Starts CrestronXsig.listen() on a local port and connects a stand-in
+control system from a separate thread.  The fake processor replays
+configurable traffic and the harness reports throughput, per-frame
+dispatch latency and event loop lag for each scenario.
+
+Only the Home Assistant independent modules (codec, store, crestron) are
+loaded, so this runs without Home Assistant installed:
+
+    python benchmarks/xsig_bench.py                  # run and compare to baselines
+    python benchmarks/xsig_bench.py --save           # store results as new baselines
+    python benchmarks/xsig_bench.py -s resync -r 5   # one scenario, 5 repeats
+    python benchmarks/xsig_bench.py --replay site.xcap --speed 0
+"""
+
+import argparse
+import asyncio
+import collections
+import importlib
+import json
+import pathlib
+import socket
+import sys
+import threading
+import time
+import types
+
+ROOT = pathlib.Path(__file__).resolve().parent.parent
+PACKAGE_DIR = ROOT / "custom_components" / "crestron"
+BASELINES = pathlib.Path(__file__).resolve().parent / "baselines.json"
+
+# Regressions beyond these ratios against the stored baseline fail the run
+THROUGHPUT_TOLERANCE = 0.8
+LATENCY_TOLERANCE = 1.5
+# Absolute slack so sub-millisecond latencies don't trip on scheduler noise
+LATENCY_SLACK_MS = 2.0
+
+LAG_INTERVAL = 0.005
+
+
+def load_library():
+    """Import the XSIG library modules without the Home Assistant package init"""
+    package = types.ModuleType("crestron_xsig")
+    package.__path__ = [str(PACKAGE_DIR)]
+    sys.modules["crestron_xsig"] = package
+    crestron = importlib.import_module("crestron_xsig.crestron")
+    codec = importlib.import_module("crestron_xsig.codec")
+    capture = importlib.import_module("crestron_xsig.capture")
+    return crestron, codec, capture
+
+
+crestron, codec, capture = load_library()
+
+
+class Traffic:
+    """Generates frames whose values always differ from the previous ones
+
+    Every generated frame is therefore a real change and produces exactly
+    one dispatch, which lets the harness pair sends with callbacks.
+    """
+
+    def __init__(self):
+        self.digital = {}
+        self.analog = {}
+        self.serial = collections.Counter()
+
+    def digitals(self, joins):
+        updates = []
+        for join in joins:
+            value = not self.digital.get(join, False)
+            self.digital[join] = value
+            updates.append((codec.FRAME_DIGITAL, join, value))
+        return updates
+
+    def analogs(self, joins, step=257):
+        updates = []
+        for join in joins:
+            value = (self.analog.get(join, 0) + step) & 0xFFFF
+            self.analog[join] = value
+            updates.append((codec.FRAME_ANALOG, join, value))
+        return updates
+
+    def serials(self, joins, length):
+        updates = []
+        for join in joins:
+            self.serial[join] += 1
+            prefix = f"{join}:{self.serial[join]}:"
+            updates.append(
+                (codec.FRAME_SERIAL, join, prefix + "x" * (length - len(prefix)))
+            )
+        return updates
+
+
+def digital_burst(traffic, batches):
+    """Scene recall style bursts of 500 digitals"""
+    for _ in range(batches):
+        yield traffic.digitals(range(1, 501)), b""
+
+
+def analog_ramp(traffic, batches):
+    """64 analog joins ramping together, as during a lighting fade"""
+    for _ in range(batches):
+        yield traffic.analogs(range(1, 65)), b""
+
+
+def serial_long(traffic, batches):
+    """Maximum length serial strings on 32 joins"""
+    for _ in range(batches):
+        yield traffic.serials(range(1, 33), codec.MAX_SERIAL_LENGTH), b""
+
+
+def resync(traffic, batches):
+    """0xFB sync request followed by a dump of every join"""
+    for _ in range(batches):
+        updates = (
+            traffic.digitals(range(1, 4097))
+            + traffic.analogs(range(1, 1025))
+            + traffic.serials(range(1, 257), 32)
+        )
+        yield updates, b"\xfb"
+
+
+SCENARIOS = {
+    "digital_burst": (digital_burst, 200, 0),
+    "analog_ramp": (analog_ramp, 500, 100),
+    "serial_long": (serial_long, 200, 50),
+    "resync": (resync, 10, 2),
+}
+
+
+def free_port():
+    """Return a TCP port that is currently free on localhost"""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def run_processor(port, batches, rate, sent, done):
+    """Fake control system: send each batch at the given rate (batches/sec)"""
+    with socket.create_connection(("127.0.0.1", port)) as sock:
+        sock.recv(1)  # 0xFD update request
+        interval = 1 / rate if rate else 0
+        next_send = time.perf_counter()
+        for updates, prefix in batches:
+            data = prefix + bytes(codec.encode_many(updates))
+            if interval:
+                delay = next_send - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                next_send += interval
+            now = time.perf_counter()
+            sent.extend([now] * len(updates))
+            sock.sendall(data)
+        done.wait(30)
+
+
+async def run_scenario(name, batches, rate):
+    """Run one scenario and return its metrics"""
+    generator, default_batches, default_rate = SCENARIOS[name]
+    batches = batches or default_batches
+    rate = default_rate if rate is None else rate
+    traffic = Traffic()
+    frames = list(generator(traffic, batches))
+    expected = sum(len(updates) for updates, _ in frames)
+
+    xsig = crestron.CrestronXsig(name="bench")
+    sent = collections.deque()
+    latencies = []
+    syncs = 0
+    done = threading.Event()
+    finished = asyncio.Event()
+    loop = asyncio.get_running_loop()
+
+    async def on_change(cbtype, value):
+        if cbtype == "available":
+            return
+        latencies.append(time.perf_counter() - sent.popleft())
+        if len(latencies) == expected:
+            finished.set()
+
+    async def on_sync():
+        nonlocal syncs
+        syncs += 1
+
+    xsig.register_callback(on_change)
+    xsig.register_sync_all_joins_callback(on_sync)
+
+    lags = []
+    monitoring = True
+
+    async def monitor_lag():
+        while monitoring:
+            start = loop.time()
+            await asyncio.sleep(LAG_INTERVAL)
+            lags.append(loop.time() - start - LAG_INTERVAL)
+
+    port = free_port()
+    await xsig.listen(port)
+    monitor = loop.create_task(monitor_lag())
+    processor = threading.Thread(
+        target=run_processor, args=(port, frames, rate, sent, done), daemon=True
+    )
+    start = time.perf_counter()
+    processor.start()
+    try:
+        await asyncio.wait_for(finished.wait(), 120)
+    finally:
+        elapsed = time.perf_counter() - start
+        monitoring = False
+        done.set()
+        await monitor
+        await xsig.stop()
+        processor.join(5)
+
+    latencies.sort()
+    lags.sort()
+    return {
+        "frames": expected,
+        "syncs": syncs,
+        "frames_per_sec": round(expected / elapsed),
+        "latency_p50_ms": round(_percentile(latencies, 0.50) * 1000, 3),
+        "latency_p99_ms": round(_percentile(latencies, 0.99) * 1000, 3),
+        "latency_max_ms": round(latencies[-1] * 1000, 3),
+        "loop_lag_p99_ms": round(_percentile(lags, 0.99) * 1000, 3),
+        "loop_lag_max_ms": round(lags[-1] * 1000, 3) if lags else 0.0,
+    }
+
+
+async def run_replay(path, speed):
+    """Replay the inbound side of a capture file and return its metrics"""
+    records = list(capture.read_capture(path))
+    xsig = crestron.CrestronXsig(name="replay")
+    dispatched = 0
+    loop = asyncio.get_running_loop()
+
+    async def on_change(cbtype, value):
+        nonlocal dispatched
+        dispatched += 1
+
+    xsig.register_callback(on_change)
+
+    lags = []
+    monitoring = True
+
+    async def monitor_lag():
+        while monitoring:
+            start = loop.time()
+            await asyncio.sleep(LAG_INTERVAL)
+            lags.append(loop.time() - start - LAG_INTERVAL)
+
+    monitor = loop.create_task(monitor_lag())
+    start = time.perf_counter()
+    replayed = await capture.replay(records, xsig, speed)
+    elapsed = time.perf_counter() - start
+    monitoring = False
+    await monitor
+
+    lags.sort()
+    return {
+        "bytes": replayed,
+        "frames": dispatched,
+        "seconds": round(elapsed, 3),
+        "frames_per_sec": round(dispatched / elapsed) if elapsed else 0,
+        "loop_lag_p99_ms": round(_percentile(lags, 0.99) * 1000, 3),
+        "loop_lag_max_ms": round(lags[-1] * 1000, 3) if lags else 0.0,
+    }
+
+
+def _percentile(values, fraction):
+    """Return the given percentile of an already sorted list"""
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def compare(name, result, baseline):
+    """Return a list of regressions of result against baseline"""
+    regressions = []
+    if result["frames_per_sec"] < baseline["frames_per_sec"] * THROUGHPUT_TOLERANCE:
+        regressions.append(
+            f"{name}: frames/sec {result['frames_per_sec']} "
+            f"< baseline {baseline['frames_per_sec']}"
+        )
+    if (
+        result["latency_p99_ms"]
+        > baseline["latency_p99_ms"] * LATENCY_TOLERANCE + LATENCY_SLACK_MS
+    ):
+        regressions.append(
+            f"{name}: p99 latency {result['latency_p99_ms']} ms "
+            f"> baseline {baseline['latency_p99_ms']} ms"
+        )
+    return regressions
+
+
+async def main(args):
+    if args.replay:
+        result = await run_replay(args.replay, args.speed)
+        print("replay         " + "  ".join(f"{k}={v}" for k, v in result.items()))
+        return 0
+
+    results = {}
+    for name in args.scenario or SCENARIOS:
+        runs = [
+            await run_scenario(name, args.batches, args.rate)
+            for _ in range(args.repeat)
+        ]
+        # Keep the median run by throughput to damp scheduling noise
+        runs.sort(key=lambda run: run["frames_per_sec"])
+        results[name] = runs[len(runs) // 2]
+        print(f"{name:14} " + "  ".join(f"{k}={v}" for k, v in results[name].items()))
+
+    if args.save:
+        baselines = json.loads(BASELINES.read_text()) if BASELINES.exists() else {}
+        baselines.update(results)
+        BASELINES.write_text(json.dumps(baselines, indent=2, sort_keys=True) + "\n")
+        print(f"Saved baselines to {BASELINES}")
+        return 0
+
+    if not BASELINES.exists():
+        return 0
+    baselines = json.loads(BASELINES.read_text())
+    regressions = []
+    for name, result in results.items():
+        if name in baselines:
+            regressions.extend(compare(name, result, baselines[name]))
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "-s", "--scenario", action="append", choices=sorted(SCENARIOS)
+    )
+    parser.add_argument("-b", "--batches", type=int, help="batches per scenario")
+    parser.add_argument(
+        "--rate", type=float, help="batches per second (0 = as fast as possible)"
+    )
+    parser.add_argument("-r", "--repeat", type=int, default=3)
+    parser.add_argument("--save", action="store_true", help="store as baselines")
+    parser.add_argument("--replay", help="replay a capture file instead")
+    parser.add_argument(
+        "--speed", type=float, default=1.0, help="replay speed (0 = max)"
+    )
+    sys.exit(asyncio.run(main(parser.parse_args())))
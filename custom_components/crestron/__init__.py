@@ -1,30 +1,73 @@
 """The Crestron Integration Component"""
 
+from datetime import timedelta
+import ipaddress
 import logging
+import os
+import time
 
 from homeassistant.config_entries import ConfigType
 import voluptuous as vol
 
 import homeassistant.helpers.config_validation as cv
 from homeassistant.helpers.discovery import async_load_platform
-from homeassistant.helpers.event import TrackTemplate, async_track_template_result
+from homeassistant.helpers.event import (
+    TrackTemplate,
+    async_track_template_result,
+    async_track_time_interval,
+)
+from homeassistant.helpers.storage import Store
 from homeassistant.helpers.template import Template
-from homeassistant.helpers.script import Script
-from homeassistant.core import HomeAssistant, callback, Context
+from homeassistant.helpers.script import (
+    CONF_MAX,
+    DEFAULT_MAX,
+    SCRIPT_MODE_CHOICES,
+    SCRIPT_MODE_PARALLEL,
+    Script,
+)
+from homeassistant.core import HomeAssistant, SupportsResponse, callback, Context
+from homeassistant.exceptions import HomeAssistantError
 from homeassistant.const import (
     EVENT_HOMEASSISTANT_STOP,
+    CONF_FILENAME,
+    CONF_HOST,
+    CONF_NAME,
     CONF_VALUE_TEMPLATE,
     CONF_ATTRIBUTE,
     CONF_ENTITY_ID,
+    CONF_MODE,
     STATE_ON,
     STATE_OFF,
-    CONF_SERVICE,
-    CONF_SERVICE_DATA,
 )
 
-from .crestron import CrestronXsig
+from .capture import XsigCapture
+from .codec import ENCODERS, MAX_SERIAL_LENGTH
+from .crestron import (
+    CrestronXsig,
+    XsigServer,
+    DEFAULT_ANALOG_MIN_INTERVAL,
+    DEFAULT_WRITE_HIGH_WATER,
+    QUEUE_DISCARD,
+    QUEUE_HOLD,
+)
+from .store import MAX_ANALOG_JOIN, MAX_DIGITAL_JOIN, MAX_SERIAL_JOIN
+from .trace import DEFAULT_TRACE_SIZE
 from .const import (
     CONF_PORT,
+    CONF_ENDPOINTS,
+    CONF_ENDPOINT,
+    DEFAULT_ENDPOINT,
+    ENDPOINTS,
+    CONF_STATE_WRITE_WINDOW,
+    CONF_WRITE_HIGH_WATER,
+    CONF_ALWAYS_SEND,
+    CONF_TRACE_SIZE,
+    CONF_ANALOG_MIN_INTERVAL,
+    CONF_DISPATCH_UNCHANGED,
+    CONF_SNAPSHOT_INTERVAL,
+    CONF_IDLE_TIMEOUT,
+    CONF_HEARTBEAT_JOIN,
+    CONF_QUEUE_POLICY,
     HUB,
     DOMAIN,
     CONF_JOIN,
@@ -34,15 +77,91 @@ from .const import (
     CONF_VALUE_JOIN,
     CONF_GET_ANALOG,
     CONF_GET_DIGITAL,
+    CONF_GET_SERIAL,
     CONF_SET_ANALOG,
     CONF_SET_DIGITAL,
+    CONF_START_CAPTURE,
+    CONF_STOP_CAPTURE,
+    CONF_STATS,
+    CONF_RESET,
+    CONF_SET_JOINS,
+    CONF_GET_JOINS,
+    CONF_JOINS,
+    CONF_TRACE,
+    CONF_CLEAR,
 )
 
 _LOGGER = logging.getLogger(__name__)
 
+STORAGE_VERSION = 1
+DEFAULT_SNAPSHOT_INTERVAL = 300
+
+JOIN_TYPES = ("d", "a", "s")
+MAX_JOINS = {"d": MAX_DIGITAL_JOIN, "a": MAX_ANALOG_JOIN, "s": MAX_SERIAL_JOIN}
+
+
+def join_key(value):
+    """Validate a join such as "d12" and return it as a ("d", 12) key"""
+    value = cv.string(value).strip().lower()
+    join_type = value[:1]
+    if (
+        join_type not in JOIN_TYPES
+        or not value[1:].isdigit()
+        or not 1 <= int(value[1:]) <= MAX_JOINS[join_type]
+    ):
+        raise vol.Invalid(
+            f"Invalid join {value}, expected e.g. d12, a3 or s7 with a join from 1 "
+            f"to {MAX_JOINS.get(join_type, MAX_DIGITAL_JOIN)}"
+        )
+    return (join_type, int(value[1:]))
+
+
+def join_range(value):
+    """Validate a join such as "d12" or range such as "d10-20" into ("d", range)"""
+    value = cv.string(value).strip().lower()
+    join_type = value[:1]
+    first, _, last = value[1:].partition("-")
+    if last[:1] == join_type:
+        last = last[1:]
+    last = last or first
+    if (
+        join_type not in JOIN_TYPES
+        or not first.isdigit()
+        or not last.isdigit()
+        or not 1 <= int(first) <= int(last) <= MAX_JOINS[join_type]
+    ):
+        raise vol.Invalid(
+            f"Invalid join {value}, expected e.g. d12 or d10-20 with joins from 1 "
+            f"to {MAX_JOINS.get(join_type, MAX_DIGITAL_JOIN)}"
+        )
+    return join_type, range(int(first), int(last) + 1)
+
+
+JOIN_VALUE_VALIDATORS = {
+    "d": cv.boolean,
+    "a": vol.All(vol.Coerce(int), vol.Range(min=0, max=65535)),
+    "s": vol.All(cv.string, vol.Length(max=MAX_SERIAL_LENGTH)),
+}
+
+
+def join_values(value):
+    """Validate a {join or range: value} mapping into a list of (type, join, value)"""
+    if not isinstance(value, dict):
+        raise vol.Invalid("Expected a mapping of joins to values")
+    updates = []
+    for key, join_value in value.items():
+        join_type, joins = join_range(key)
+        try:
+            join_value = JOIN_VALUE_VALIDATORS[join_type](join_value)
+        except vol.Invalid as err:
+            raise vol.Invalid(f"Invalid value for {key}: {err}") from err
+        updates.extend((join_type, join, join_value) for join in joins)
+    return updates
+
+
 TO_JOINS_SCHEMA = vol.Schema(
     {
-        vol.Required(CONF_JOIN): cv.string,
+        vol.Required(CONF_JOIN): join_key,
         vol.Optional(CONF_ENTITY_ID): cv.entity_id,
         vol.Optional(CONF_ATTRIBUTE): cv.string,
         vol.Optional(CONF_VALUE_TEMPLATE): cv.template,
@@ -50,19 +169,140 @@ TO_JOINS_SCHEMA = vol.Schema(
 )
 
 FROM_JOINS_SCHEMA = vol.Schema(
-    {vol.Required(CONF_JOIN): cv.string, vol.Required(CONF_SCRIPT): cv.SCRIPT_SCHEMA}
+    {
+        vol.Required(CONF_JOIN): join_key,
+        vol.Required(CONF_SCRIPT): cv.SCRIPT_SCHEMA,
+        vol.Optional(CONF_MODE, default=SCRIPT_MODE_PARALLEL): vol.In(
+            SCRIPT_MODE_CHOICES
+        ),
+        vol.Optional(CONF_MAX, default=DEFAULT_MAX): vol.All(
+            vol.Coerce(int), vol.Range(min=2)
+        ),
+        vol.Optional(CONF_DISPATCH_UNCHANGED, default=False): cv.boolean,
+    }
 )
 
+ENDPOINT_OPTIONS = {
+    vol.Optional(CONF_STATE_WRITE_WINDOW, default=0): vol.All(
+        vol.Coerce(float), vol.Range(min=0)
+    ),
+    vol.Optional(CONF_WRITE_HIGH_WATER, default=DEFAULT_WRITE_HIGH_WATER): vol.All(
+        vol.Coerce(int), vol.Range(min=1024)
+    ),
+    vol.Optional(CONF_TRACE_SIZE, default=DEFAULT_TRACE_SIZE): vol.All(
+        vol.Coerce(int), vol.Range(min=0, max=65536)
+    ),
+    vol.Optional(
+        CONF_ANALOG_MIN_INTERVAL, default=DEFAULT_ANALOG_MIN_INTERVAL
+    ): vol.All(vol.Coerce(float), vol.Range(min=0)),
+    vol.Optional(CONF_SNAPSHOT_INTERVAL, default=DEFAULT_SNAPSHOT_INTERVAL): vol.All(
+        vol.Coerce(int), vol.Range(min=0)
+    ),
+    vol.Optional(CONF_IDLE_TIMEOUT, default=0): vol.All(
+        vol.Coerce(float), vol.Range(min=0)
+    ),
+    vol.Optional(CONF_HEARTBEAT_JOIN): vol.All(
+        vol.Coerce(int), vol.Range(min=1, max=MAX_DIGITAL_JOIN)
+    ),
+    vol.Optional(CONF_QUEUE_POLICY, default=QUEUE_DISCARD): vol.In(
+        [QUEUE_DISCARD, QUEUE_HOLD]
+    ),
+    vol.Optional(CONF_ALWAYS_SEND, default=[]): vol.All(cv.ensure_list, [join_key]),
+    vol.Optional(CONF_TO_HUB): vol.All(cv.ensure_list, [TO_JOINS_SCHEMA]),
+    vol.Optional(CONF_FROM_HUB): vol.All(cv.ensure_list, [FROM_JOINS_SCHEMA]),
+}
+
+
+def _host_address(value):
+    """Validate a processor address into the form connections report it in
+
+    The server listens on IPv4 only and matches connections on their peer
+    address, so hostnames and IPv6 addresses could never match.
+    """
+    try:
+        return str(ipaddress.IPv4Address(cv.string(value).strip()))
+    except ValueError as err:
+        raise vol.Invalid(
+            f"Invalid host {value}, expected the IPv4 address of the control system"
+        ) from err
+
+
+ENDPOINT_SCHEMA = vol.Schema(
+    {
+        # Also used in the join snapshot's storage file name
+        vol.Required(CONF_NAME): cv.slug,
+        vol.Required(CONF_PORT): cv.port,
+        vol.Optional(CONF_HOST): _host_address,
+        **ENDPOINT_OPTIONS,
+    }
+)
+
+
+def _validate_endpoints(config):
+    """Check that endpoint names and (port, host) bindings are unique"""
+    names = set()
+    bindings = set()
+    for endpoint in _endpoint_configs(config):
+        if endpoint[CONF_NAME] in names:
+            raise vol.Invalid(f"Duplicate endpoint name {endpoint[CONF_NAME]}")
+        binding = (endpoint[CONF_PORT], endpoint.get(CONF_HOST))
+        if binding in bindings:
+            raise vol.Invalid(
+                f"Port {binding[0]} has more than one endpoint for "
+                f"{binding[1] or 'any host'}"
+            )
+        # A healthy processor is silent when idle; only an unanswered
+        # heartbeat tells a dead link from a quiet one
+        if (CONF_HEARTBEAT_JOIN in endpoint) != bool(endpoint[CONF_IDLE_TIMEOUT]):
+            raise vol.Invalid(
+                f"{CONF_HEARTBEAT_JOIN} and {CONF_IDLE_TIMEOUT} of endpoint "
+                f"{endpoint[CONF_NAME]} must be set together"
+            )
+        names.add(endpoint[CONF_NAME])
+        bindings.add(binding)
+    return config
+
+
+def _validate_top_level_options(config):
+    """Reject hub options at the top level when there is no top-level port
+
+    Without a port the top level is not an endpoint, so its options would
+    silently apply to nothing.
+    """
+    if isinstance(config, dict) and CONF_PORT not in config:
+        options = [key.schema for key in ENDPOINT_OPTIONS if key.schema in config]
+        if options:
+            raise vol.Invalid(
+                f"{', '.join(options)} need a top-level {CONF_PORT}; "
+                f"set them on an endpoint under {CONF_ENDPOINTS} instead"
+            )
+    return config
+
+
+def _endpoint_configs(config):
+    """Return the endpoint configs, the top-level port being the default endpoint"""
+    endpoints = []
+    if CONF_PORT in config:
+        endpoints.append({**config, CONF_NAME: DEFAULT_ENDPOINT})
+    endpoints.extend(config.get(CONF_ENDPOINTS, []))
+    return endpoints
+
+
 CONFIG_SCHEMA = vol.Schema(
     {
-        DOMAIN: vol.Schema(
-            {
-                vol.Required(CONF_PORT): cv.port,
-                vol.Optional(CONF_TO_HUB): vol.All(cv.ensure_list, [TO_JOINS_SCHEMA]),
-                vol.Optional(CONF_FROM_HUB): vol.All(
-                    cv.ensure_list, [FROM_JOINS_SCHEMA]
-                ),
-            }
+        DOMAIN: vol.All(
+            _validate_top_level_options,
+            vol.Schema(
+                {
+                    vol.Optional(CONF_PORT): cv.port,
+                    vol.Optional(CONF_ENDPOINTS): vol.All(
+                        cv.ensure_list, [ENDPOINT_SCHEMA]
+                    ),
+                    **ENDPOINT_OPTIONS,
+                }
+            ),
+            cv.has_at_least_one_key(CONF_PORT, CONF_ENDPOINTS),
+            _validate_endpoints,
         )
     },
     extra=vol.ALLOW_EXTRA,
@@ -70,18 +310,28 @@ CONFIG_SCHEMA = vol.Schema(
 
 GET_ANALOG_SCHEMA = vol.Schema(
     {
+        vol.Optional(CONF_ENDPOINT, default=DEFAULT_ENDPOINT): cv.string,
         vol.Required(CONF_JOIN): cv.positive_int,
     }
 )
 
 GET_DIGITAL_SCHEMA = vol.Schema(
     {
+        vol.Optional(CONF_ENDPOINT, default=DEFAULT_ENDPOINT): cv.string,
+        vol.Required(CONF_JOIN): cv.positive_int,
+    }
+)
+
+GET_SERIAL_SCHEMA = vol.Schema(
+    {
+        vol.Optional(CONF_ENDPOINT, default=DEFAULT_ENDPOINT): cv.string,
         vol.Required(CONF_JOIN): cv.positive_int,
     }
 )
 
 SET_ANALOG_SCHEME = vol.Schema(
     {
+        vol.Optional(CONF_ENDPOINT, default=DEFAULT_ENDPOINT): cv.string,
         vol.Required(CONF_JOIN): cv.positive_int,
         vol.Required(CONF_VALUE_JOIN): cv.boolean,
     }
@@ -89,11 +339,62 @@ SET_ANALOG_SCHEME = vol.Schema(
 
 SET_DIGITAL_SCHEME = vol.Schema(
     {
+        vol.Optional(CONF_ENDPOINT, default=DEFAULT_ENDPOINT): cv.string,
         vol.Required(CONF_JOIN): cv.positive_int,
         vol.Required(CONF_VALUE_JOIN): cv.boolean,
     }
 )
 
+SET_JOINS_SCHEMA = vol.Schema(
+    {
+        vol.Optional(CONF_ENDPOINT, default=DEFAULT_ENDPOINT): cv.string,
+        vol.Required(CONF_JOINS): join_values,
+    }
+)
+
+GET_JOINS_SCHEMA = vol.Schema(
+    {
+        vol.Optional(CONF_ENDPOINT, default=DEFAULT_ENDPOINT): cv.string,
+        vol.Required(CONF_JOINS): vol.All(cv.ensure_list, [join_range]),
+    }
+)
+
+
+def _capture_filename(value):
+    """Validate a capture file name, which is created in the config directory"""
+    value = cv.string(value)
+    if os.path.basename(value) != value or value in (".", ".."):
+        raise vol.Invalid("filename must not contain a directory")
+    return value
+
+
+START_CAPTURE_SCHEMA = vol.Schema(
+    {
+        vol.Optional(CONF_ENDPOINT, default=DEFAULT_ENDPOINT): cv.string,
+        vol.Optional(CONF_FILENAME): _capture_filename,
+    }
+)
+
+STOP_CAPTURE_SCHEMA = vol.Schema(
+    {
+        vol.Optional(CONF_ENDPOINT, default=DEFAULT_ENDPOINT): cv.string,
+    }
+)
+
+TRACE_SCHEMA = vol.Schema(
+    {
+        vol.Optional(CONF_ENDPOINT, default=DEFAULT_ENDPOINT): cv.string,
+        vol.Optional(CONF_CLEAR, default=False): cv.boolean,
+    }
+)
+
+STATS_SCHEMA = vol.Schema(
+    {
+        vol.Optional(CONF_ENDPOINT): cv.string,
+        vol.Optional(CONF_RESET, default=False): cv.boolean,
+    }
+)
+
 PLATFORMS = [
     "binary_sensor",
     "sensor",
@@ -109,11 +410,30 @@ async def async_setup(hass: HomeAssistant, config: ConfigType):
     """Set up a the crestron component."""
 
     if config.get(DOMAIN) is not None:
-        hass.data[DOMAIN] = {}
-        hub = CrestronHub(hass, config[DOMAIN])
-
-        await hub.start()
-        hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STOP, hub.stop)
+        hass.data[DOMAIN] = {ENDPOINTS: {}}
+        hubs = []
+        servers = {}
+        for endpoint_config in _endpoint_configs(config[DOMAIN]):
+            hub = CrestronHub(hass, endpoint_config)
+            port = endpoint_config[CONF_PORT]
+            if port not in servers:
+                servers[port] = XsigServer(port)
+            servers[port].add_endpoint(hub.hub, endpoint_config.get(CONF_HOST))
+            hubs.append(hub)
+            await hub.async_restore()
+        hass.data[DOMAIN][HUB] = hass.data[DOMAIN][ENDPOINTS].get(DEFAULT_ENDPOINT)
+        _async_register_services(hass)
+
+        for server in servers.values():
+            await server.start()
+
+        async def async_stop(event):
+            for hub in hubs:
+                await hub.stop(event)
+            for server in servers.values():
+                await server.stop()
+
+        hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STOP, async_stop)
 
         for platform in PLATFORMS:
             hass.async_create_task(
@@ -123,15 +443,266 @@ async def async_setup(hass: HomeAssistant, config: ConfigType):
     return True
 
 
+def get_endpoint(hass, name):
+    """Return the CrestronXsig endpoint with the given name"""
+    endpoint = hass.data[DOMAIN][ENDPOINTS].get(name)
+    if endpoint is None:
+        raise HomeAssistantError(f"Unknown {DOMAIN} endpoint {name}")
+    return endpoint
+
+
+@callback
+def _async_register_services(hass):
+    """Register the join services, which act on the endpoint named in the call"""
+
+    def register_get_service(service, getter, schema):
+        """Register a get service that responds with the join value
+
+        Callers that don't ask for a response get it as a
+        crestron_<service>_response event instead, as before.
+        """
+
+        async def async_get(call):
+            hub = get_endpoint(hass, call.data[CONF_ENDPOINT])
+            join = call.data[CONF_JOIN]
+            value = getter(hub, join)
+            _LOGGER.debug(f"{DOMAIN}.{service} join {join}: {value}")
+            response = {CONF_JOIN: join, CONF_VALUE_JOIN: value}
+            if call.return_response:
+                return response
+            hass.bus.async_fire(f"{DOMAIN}_{service}_response", response)
+            return None
+
+        hass.services.async_register(
+            DOMAIN,
+            service,
+            async_get,
+            schema=schema,
+            supports_response=SupportsResponse.OPTIONAL,
+        )
+
+    register_get_service(CONF_GET_ANALOG, CrestronXsig.get_analog, GET_ANALOG_SCHEMA)
+    register_get_service(
+        CONF_GET_DIGITAL, CrestronXsig.get_digital, GET_DIGITAL_SCHEMA
+    )
+    register_get_service(CONF_GET_SERIAL, CrestronXsig.get_serial, GET_SERIAL_SCHEMA)
+
+    async def async_set_analog(event):
+        hub = get_endpoint(hass, event.data[CONF_ENDPOINT])
+        _LOGGER.debug(
+            f"async_set_analog setting join {event.data[CONF_JOIN]} to {event.data[CONF_VALUE_JOIN]}"
+        )
+        hub.set_analog(event.data[CONF_JOIN], event.data[CONF_VALUE_JOIN])
+
+    hass.services.async_register(
+        DOMAIN,
+        CONF_SET_ANALOG,
+        async_set_analog,
+        schema=SET_ANALOG_SCHEME,
+    )
+
+    async def async_set_digital(event):
+        hub = get_endpoint(hass, event.data[CONF_ENDPOINT])
+        _LOGGER.debug(
+            f"async_set_digital setting join {event.data[CONF_JOIN]} to {event.data[CONF_VALUE_JOIN]}"
+        )
+        hub.set_digital(event.data[CONF_JOIN], event.data[CONF_VALUE_JOIN])
+
+    hass.services.async_register(
+        DOMAIN,
+        CONF_SET_DIGITAL,
+        async_set_digital,
+        schema=SET_DIGITAL_SCHEME,
+    )
+
+    async def async_set_joins(call):
+        hub = get_endpoint(hass, call.data[CONF_ENDPOINT])
+        sent = hub.set_joins(call.data[CONF_JOINS])
+        if sent is None:
+            raise HomeAssistantError(
+                f"Could not send joins to {hub.name}: not connected to the "
+                "control system or outbound queue full"
+            )
+        _LOGGER.debug(
+            f"{DOMAIN}.set_joins sent {sent} of {len(call.data[CONF_JOINS])} joins"
+        )
+
+    hass.services.async_register(
+        DOMAIN, CONF_SET_JOINS, async_set_joins, schema=SET_JOINS_SCHEMA
+    )
+
+    async def async_get_joins(call):
+        hub = get_endpoint(hass, call.data[CONF_ENDPOINT])
+        getters = {
+            "d": hub.get_digitals,
+            "a": hub.get_analogs,
+            "s": hub.get_serials,
+        }
+        response = {}
+        for join_type, joins in call.data[CONF_JOINS]:
+            for join, value in zip(joins, getters[join_type](joins)):
+                response[f"{join_type}{join}"] = value
+        return response
+
+    hass.services.async_register(
+        DOMAIN,
+        CONF_GET_JOINS,
+        async_get_joins,
+        schema=GET_JOINS_SCHEMA,
+        supports_response=SupportsResponse.ONLY,
+    )
+
+    async def async_start_capture(call):
+        hub = get_endpoint(hass, call.data[CONF_ENDPOINT])
+        filename = call.data.get(
+            CONF_FILENAME,
+            f"{DOMAIN}_{hub.name}_{time.strftime('%Y%m%d_%H%M%S')}.xcap",
+        )
+        path = hass.config.path(filename)
+        capture = await hass.async_add_executor_job(XsigCapture.open, path)
+        previous = hub.stop_capture()
+        hub.start_capture(capture)
+        if previous is not None:
+            await hass.async_add_executor_job(previous.close)
+        _LOGGER.info(f"Capturing {hub.name} XSIG traffic to {path}")
+
+    hass.services.async_register(
+        DOMAIN,
+        CONF_START_CAPTURE,
+        async_start_capture,
+        schema=START_CAPTURE_SCHEMA,
+    )
+
+    async def async_stop_capture(call):
+        hub = get_endpoint(hass, call.data[CONF_ENDPOINT])
+        capture = hub.stop_capture()
+        if capture is not None:
+            await hass.async_add_executor_job(capture.close)
+            _LOGGER.info(f"Stopped capturing {hub.name} XSIG traffic")
+
+    hass.services.async_register(
+        DOMAIN,
+        CONF_STOP_CAPTURE,
+        async_stop_capture,
+        schema=STOP_CAPTURE_SCHEMA,
+    )
+
+    async def async_stats(call):
+        if CONF_ENDPOINT in call.data:
+            name = call.data[CONF_ENDPOINT]
+            hubs = {name: get_endpoint(hass, name)}
+        else:
+            hubs = hass.data[DOMAIN][ENDPOINTS]
+        response = {}
+        for name, hub in hubs.items():
+            response[name] = hub.get_stats()
+            if call.data[CONF_RESET]:
+                hub.stats.reset()
+        return response
+
+    hass.services.async_register(
+        DOMAIN,
+        CONF_STATS,
+        async_stats,
+        schema=STATS_SCHEMA,
+        supports_response=SupportsResponse.ONLY,
+    )
+
+    async def async_trace(call):
+        hub = get_endpoint(hass, call.data[CONF_ENDPOINT])
+        if hub.trace is None:
+            raise HomeAssistantError(f"Frame trace is disabled for {hub.name}")
+        response = hub.trace.dump()
+        if call.data[CONF_CLEAR]:
+            hub.trace.clear()
+        return response
+
+    hass.services.async_register(
+        DOMAIN,
+        CONF_TRACE,
+        async_trace,
+        schema=TRACE_SCHEMA,
+        supports_response=SupportsResponse.ONLY,
+    )
+
+
+# Template results are parsed, so the converters below get bool, int, float
+# and None as well as str values
+
+
+def _to_digital(result):
+    """Convert a rendered template to a digital join value"""
+    if isinstance(result, bool):
+        return result
+    if result == STATE_ON or result == "True":
+        return True
+    if result == STATE_OFF or result == "False":
+        return False
+    return None
+
+
+def _to_analog(result):
+    """Convert a rendered template to an analog join value"""
+    if result is None or result == "None":
+        return None
+    try:
+        return int(float(result)) if isinstance(result, str) else int(result)
+    except (TypeError, ValueError, OverflowError):
+        _LOGGER.warning(f"Could not convert {result!r} to an analog value")
+        return None
+
+
+def _to_serial(result):
+    """Convert a rendered template to a serial join value"""
+    if result is None or result == "None":
+        return None
+    value = str(result)
+    if len(value) > MAX_SERIAL_LENGTH:
+        _LOGGER.info(
+            f"Could not send. String too long ({len(value)}>{MAX_SERIAL_LENGTH})"
+        )
+        return None
+    return value
+
+
+CONVERTERS = {"d": _to_digital, "a": _to_analog, "s": _to_serial}
+
+
 class CrestronHub:
     """Wrapper for the CrestronXsig library"""
 
     def __init__(self, hass, config):
         self.hass = hass
-        self.hub = hass.data[DOMAIN][HUB] = CrestronXsig()
-        self.port = config.get(CONF_PORT)
+        self.name = config[CONF_NAME]
+        self.hub = hass.data[DOMAIN][ENDPOINTS][self.name] = CrestronXsig(
+            name=self.name,
+            state_write_window=config[CONF_STATE_WRITE_WINDOW],
+            write_high_water=config[CONF_WRITE_HIGH_WATER],
+            trace_size=config[CONF_TRACE_SIZE],
+            analog_min_interval=config[CONF_ANALOG_MIN_INTERVAL],
+            idle_timeout=config[CONF_IDLE_TIMEOUT],
+            heartbeat_join=config.get(CONF_HEARTBEAT_JOIN),
+            queue_policy=config[CONF_QUEUE_POLICY],
+        )
+        self.hub.set_always_send(config[CONF_ALWAYS_SEND])
         self.context = Context()
         self.to_hub = {}
+        self.tracker = None
+        self._snapshot_interval = config[CONF_SNAPSHOT_INTERVAL]
+        self._snapshot_store = None
+        self._snapshot_tracker = None
+        if self._snapshot_interval:
+            self._snapshot_store = Store(
+                hass, STORAGE_VERSION, f"{DOMAIN}.{self.name}.joins"
+            )
+        self._from_index = {}
+        self._routes = {}
+        self._sync_frames = {}
+        self._setters = {
+            "d": self.hub.set_digital,
+            "a": self.hub.set_analog,
+            "s": self.hub.set_serial,
+        }
         self.hub.register_sync_all_joins_callback(self.sync_joins_to_hub)
         if CONF_TO_HUB in config:
             track_templates = []
@@ -163,164 +734,135 @@ class CrestronHub:
                     track_templates.append(
                         TrackTemplate(template, None, rate_limit=0.5)
                     )
+            self._compile_routes()
             self.tracker = async_track_template_result(
                 self.hass, track_templates, self.template_change_callback
             )
         if CONF_FROM_HUB in config:
             self.from_hub = config[CONF_FROM_HUB]
-            self.hub.register_callback(self.join_change_callback)
-
-        async def async_get_analog(call):
-            join = call.data[CONF_JOIN]
-            value = self.hub.get_analog(join)
-            self.hass.bus.async_fire(
-                f"{DOMAIN}_get_analog_response",
-                {CONF_JOIN: join, CONF_VALUE_JOIN: value},
+            for entry in self.from_hub:
+                join_type, join = entry[CONF_JOIN]
+                script = Script(
+                    hass,
+                    entry[CONF_SCRIPT],
+                    f"Crestron Join Change {join_type}{join}",
+                    DOMAIN,
+                    script_mode=entry[CONF_MODE],
+                    max_runs=entry[CONF_MAX],
+                )
+                self._from_index.setdefault(f"{join_type}{join}", []).append(script)
+            self.hub.subscribe(
+                [entry[CONF_JOIN] for entry in self.from_hub],
+                self.join_change_callback,
             )
-            _LOGGER.debug(f"{DOMAIN}.get_analog join {join}: {value}")
-
-        self.hass.services.async_register(
-            DOMAIN, CONF_GET_ANALOG, async_get_analog, schema=GET_ANALOG_SCHEMA
-        )
-
-        async def async_get_digital(call):
-            join = call.data[CONF_JOIN]
-            value = self.hub.get_digital(join)
-            self.hass.bus.async_fire(
-                f"{DOMAIN}_get_digital_response",
-                {CONF_JOIN: join, CONF_VALUE_JOIN: value},
-            )
-            _LOGGER.debug(f"{DOMAIN}.get_digital join {join}: {value}")
-
-        self.hass.services.async_register(
-            DOMAIN, CONF_GET_DIGITAL, async_get_digital, schema=GET_DIGITAL_SCHEMA
-        )
-
-        async def async_set_analog(event):
-            _LOGGER.debug(
-                f"async_set_analog setting join {event.data[CONF_JOIN]} to {event.data[CONF_VALUE_JOIN]}"
-            )
-            self.hub.set_analog(event.data[CONF_JOIN], event.data[CONF_VALUE_JOIN])
-
-        self.hass.services.async_register(
-            DOMAIN,
-            CONF_SET_ANALOG,
-            async_set_analog,
-            schema=SET_ANALOG_SCHEME,
-        )
-
-        async def async_set_digital(event):
-            _LOGGER.debug(
-                f"async_set_digital setting join {event.data[CONF_JOIN]} to {event.data[CONF_VALUE_JOIN]}"
+            self.hub.set_dispatch_unchanged(
+                entry[CONF_JOIN]
+                for entry in self.from_hub
+                if entry[CONF_DISPATCH_UNCHANGED]
             )
-            self.hub.set_digital(event.data[CONF_JOIN], event.data[CONF_VALUE_JOIN])
 
-        self.hass.services.async_register(
-            DOMAIN,
-            CONF_SET_DIGITAL,
-            async_set_digital,
-            schema=SET_DIGITAL_SCHEME,
+    async def async_restore(self):
+        """Load the saved join snapshot and start saving it periodically"""
+        if self._snapshot_store is None:
+            return
+        data = await self._snapshot_store.async_load()
+        if data is not None:
+            try:
+                self.hub.restore(data)
+            except (KeyError, TypeError, ValueError) as err:
+                _LOGGER.warning(
+                    f"Ignoring invalid join snapshot for {self.name}: {err}"
+                )
+            else:
+                _LOGGER.info(f"Restored join values for {self.name}")
+        self._snapshot_tracker = async_track_time_interval(
+            self.hass,
+            self._async_save_snapshot,
+            timedelta(seconds=self._snapshot_interval),
         )
 
-    async def start(self):
-        await self.hub.listen(self.port)
+    async def _async_save_snapshot(self, now=None):
+        """Save the join values if they changed since the last save"""
+        if self.hub.joins_dirty():
+            await self._snapshot_store.async_save(self.hub.dump_joins())
 
     async def stop(self, event):
         """remove callback(s) and template trackers"""
-        self.hub.remove_callback(self.join_change_callback)
-        self.tracker.async_remove()
+        self.hub.unsubscribe(self.join_change_callback)
+        if self.tracker is not None:
+            self.tracker.async_remove()
+        if self._snapshot_tracker is not None:
+            self._snapshot_tracker()
+            await self._async_save_snapshot()
         await self.hub.stop()
+        capture = self.hub.stop_capture()
+        if capture is not None:
+            await self.hass.async_add_executor_job(capture.close)
 
     async def join_change_callback(self, cbtype, value):
-        """Call service for tracked join change (from_hub)"""
-        for join in self.from_hub:
-            if cbtype == join[CONF_JOIN]:
-                # For digital joins, ignore on>off transitions  (avoids double calls to service for momentary presses)
-                if cbtype[:1] == "d" and value == "0":
-                    pass
-                else:
-                    if CONF_SERVICE in join and CONF_SERVICE_DATA in join:
-                        data = dict(join[CONF_SERVICE_DATA])
-                        _LOGGER.debug(
-                            f"join_change_callback calling service {join[CONF_SERVICE]} with data = {data} from join {cbtype} = {value}"
-                        )
-                        domain, service = join[CONF_SERVICE].split(".")
-                        await self.hass.services.async_call(domain, service, data)
-                    elif CONF_SCRIPT in join:
-                        sequence = join[CONF_SCRIPT]
-                        script = Script(
-                            self.hass, sequence, "Crestron Join Change", DOMAIN
-                        )
-                        await script.async_run({"value": value}, self.context)
-                        _LOGGER.debug(
-                            f"join_change_callback calling script {join[CONF_SCRIPT]} from join {cbtype} = {value}"
-                        )
+        """Run scripts for tracked join change (from_hub)"""
+        scripts = self._from_index.get(cbtype)
+        if scripts is None:
+            return
+        # For digital joins, ignore on>off transitions  (avoids double calls to service for momentary presses)
+        if cbtype[:1] == "d" and value == "0":
+            return
+        for script in scripts:
+            _LOGGER.debug(
+                "join_change_callback calling script %s from join %s = %s",
+                script.name,
+                cbtype,
+                value,
+            )
+            self.hass.async_create_task(
+                script.async_run({"value": value}, self.context)
+            )
+
+    def _compile_routes(self):
+        """Map each to_joins template to its pre-parsed (type, join, converter) routes"""
+        self._routes = {}
+        for (join_type, join), template in self.to_hub.items():
+            self._routes.setdefault(template, []).append(
+                (join_type, join, CONVERTERS[join_type])
+            )
 
     @callback
     def template_change_callback(self, event, updates):
         """Set join from value_template (to_hub)"""
-        # track_template_result = updates.pop()
         for track_template_result in updates:
             update_result = track_template_result.result
-            update_template = track_template_result.template
-            if update_result != "None":
-                for join, template in self.to_hub.items():
-                    if template == update_template:
-                        _LOGGER.debug(
-                            f"processing template_change_callback for join {join} with result {update_result}"
-                        )
-                        # Digital Join
-                        if join[:1] == "d":
-                            value = None
-                            if update_result == STATE_ON or update_result == "True":
-                                value = True
-                            elif update_result == STATE_OFF or update_result == "False":
-                                value = False
-                            if value is not None:
-                                _LOGGER.debug(
-                                    f"template_change_callback setting digital join {int(join[1:])} to {value}"
-                                )
-                                self.hub.set_digital(int(join[1:]), value)
-                        # Analog Join
-                        if join[:1] == "a":
-                            _LOGGER.debug(
-                                f"template_change_callback setting analog join {int(join[1:])} to {int(update_result)}"
-                            )
-                            self.hub.set_analog(int(join[1:]), int(update_result))
-                        # Serial Join
-                        if join[:1] == "s":
-                            _LOGGER.debug(
-                                f"template_change_callback setting serial join {int(join[1:])} to {str(update_result)}"
-                            )
-                            self.hub.set_serial(int(join[1:]), str(update_result))
+            for join_type, join, convert in self._routes.get(
+                track_template_result.template, ()
+            ):
+                value = convert(update_result)
+                if value is not None:
+                    _LOGGER.debug(
+                        "template_change_callback setting %s%s to %s",
+                        join_type,
+                        join,
+                        value,
+                    )
+                    self._setters[join_type](join, value)
 
     async def sync_joins_to_hub(self):
+        """Send every to_joins value to the control system in one write"""
         _LOGGER.debug("Syncing joins to control system")
-        for join, template in self.to_hub.items():
+        updates = []
+        for template, routes in self._routes.items():
+            # Parsed like the results TrackTemplate passes to template_change_callback
             result = template.async_render()
-            # Digital Join
-            if join[:1] == "d":
-                value = None
-                if result == STATE_ON or result == "True":
-                    value = True
-                elif result == STATE_OFF or result == "False":
-                    value = False
-                if value is not None:
-                    _LOGGER.debug(
-                        f"sync_joins_to_hub setting digital join {int(join[1:])} to {value}"
-                    )
-                    self.hub.set_digital(int(join[1:]), value)
-            # Analog Join
-            if join[:1] == "a":
-                if result != "None":
-                    _LOGGER.debug(
-                        f"sync_joins_to_hub setting analog join {int(join[1:])} to {int(result)}"
-                    )
-                    self.hub.set_analog(int(join[1:]), int(result))
-            # Serial Join
-            if join[:1] == "s":
-                if result != "None":
-                    _LOGGER.debug(
-                        f"sync_joins_to_hub setting serial join {int(join[1:])} to {str(result)}"
-                    )
-                    self.hub.set_serial(int(join[1:]), str(result))
+            # 1, 1.0 and True compare equal but convert differently
+            result_key = (type(result), result)
+            for join_type, join, convert in routes:
+                key = (join_type, join)
+                cached = self._sync_frames.get(key)
+                if cached is None or cached[0] != result_key:
+                    value = convert(result)
+                    update = None
+                    if value is not None:
+                        frame = ENCODERS[join_type](join, value)
+                        update = (join_type, join, value, frame)
+                    cached = self._sync_frames[key] = (result_key, update)
+                if cached[1] is not None:
+                    updates.append(cached[1])
+        self.hub.send_sync(updates)
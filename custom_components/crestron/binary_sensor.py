@@ -3,17 +3,19 @@
 import voluptuous as vol
 import logging
 
-from homeassistant.helpers.entity import Entity
 from homeassistant.const import STATE_ON, STATE_OFF, CONF_NAME, CONF_DEVICE_CLASS
 import homeassistant.helpers.config_validation as cv
 
-from .const import HUB, DOMAIN, CONF_JOIN, CONF_IS_ON_JOIN
+from . import get_endpoint
+from .const import DEFAULT_ENDPOINT, CONF_ENDPOINT, CONF_IS_ON_JOIN
+from .entity import CrestronEntity
 
 _LOGGER = logging.getLogger(__name__)
 
 PLATFORM_SCHEMA = vol.Schema(
     {
         vol.Required(CONF_NAME): cv.string,
+        vol.Optional(CONF_ENDPOINT): cv.string,
         vol.Required(CONF_IS_ON_JOIN): cv.positive_int,           
         vol.Required(CONF_DEVICE_CLASS): cv.string,
     },
@@ -24,30 +26,20 @@ async def async_setup_platform(hass, config, async_add_entities, discovery_info=
     if not config or len(config) <= 1:
         return
 
-    hub = hass.data[DOMAIN][HUB]
+    hub = get_endpoint(hass, config.get(CONF_ENDPOINT, DEFAULT_ENDPOINT))
     entity = [CrestronBinarySensor(hub, config)]
     async_add_entities(entity)
 
 
-class CrestronBinarySensor(Entity):
+class CrestronBinarySensor(CrestronEntity):
     def __init__(self, hub, config):
-        self._hub = hub
         self._name = config.get(CONF_NAME)
         self._join = config.get(CONF_IS_ON_JOIN)
         self._device_class = config.get(CONF_DEVICE_CLASS)
+        super().__init__(hub, [("d", self._join)])
 
-    async def async_added_to_hass(self):
-        self._hub.register_callback(self.process_callback)
-
-    async def async_will_remove_from_hass(self):
-        self._hub.remove_callback(self.process_callback)
-
-    async def process_callback(self, cbtype, value):
-        self.async_write_ha_state()
-
-    @property
-    def available(self):
-        return self._hub.is_available()
+    def _derived_state(self):
+        return self.is_on
 
     @property
     def name(self):
@@ -59,11 +51,11 @@ class CrestronBinarySensor(Entity):
 
     @property
     def is_on(self):
-        return self._hub.get_digital(self._join)
+        return self._digitals[self._join]
 
     @property
     def state(self):
-        if self._hub.get_digital(self._join):
+        if self._digitals[self._join]:
             return STATE_ON
         else:
             return STATE_OFF
\ No newline at end of file
@@ -0,0 +1,112 @@
+"""Record and replay of raw XSIG traffic
+
+A capture file starts with CAPTURE_MAGIC followed by one record per chunk
+of data read from or written to the control system.  Each record is a
+little-endian header (direction byte, nanoseconds since the capture
+started as a u64, payload length as a u32) followed by the payload.
+"""
+
+import asyncio
+import logging
+import queue
+import struct
+import threading
+import time
+
+from .codec import XsigParser
+
+_LOGGER = logging.getLogger(__name__)
+
+CAPTURE_MAGIC = b"XSIGCAP1"
+INBOUND = 0
+OUTBOUND = 1
+
+_RECORD = struct.Struct("<BQI")
+
+
+class XsigCapture:
+    """Writes raw XSIG traffic to a capture file
+
+    record() only queues the record; a background thread writes it, so the
+    event loop never waits for the disk.
+    """
+
+    def __init__(self, file):
+        """Initialize XsigCapture object on an open binary file"""
+        self._file = file
+        self._start = time.monotonic_ns()
+        self._queue = queue.SimpleQueue()
+        file.write(CAPTURE_MAGIC)
+        self._thread = threading.Thread(
+            target=self._write_records, name="xsig_capture", daemon=True
+        )
+        self._thread.start()
+
+    @classmethod
+    def open(cls, path):
+        """Create a capture file (blocking, run it in an executor)"""
+        return cls(open(path, "wb", buffering=1 << 20))
+
+    def record(self, direction, data):
+        """Queue a chunk of traffic to be appended to the file"""
+        self._queue.put(
+            _RECORD.pack(direction, time.monotonic_ns() - self._start, len(data))
+            + data
+        )
+
+    def _write_records(self):
+        """Write queued records until close() queues None"""
+        failed = False
+        while (record := self._queue.get()) is not None:
+            if failed:
+                continue
+            try:
+                self._file.write(record)
+            except OSError as err:
+                _LOGGER.error(f"Could not write to capture file: {err}")
+                failed = True
+
+    def close(self):
+        """Write queued records and close the file (blocking, run it in an executor)"""
+        self._queue.put(None)
+        self._thread.join()
+        self._file.close()
+
+
+def read_capture(path):
+    """Yield (direction, seconds since start, data) records from a capture file"""
+    with open(path, "rb") as file:
+        if file.read(len(CAPTURE_MAGIC)) != CAPTURE_MAGIC:
+            raise ValueError(f"{path} is not an XSIG capture file")
+        while header := file.read(_RECORD.size):
+            if len(header) < _RECORD.size:
+                _LOGGER.warning(f"Truncated record at end of {path}")
+                return
+            direction, offset, length = _RECORD.unpack(header)
+            data = file.read(length)
+            if len(data) < length:
+                _LOGGER.warning(f"Truncated record at end of {path}")
+                return
+            yield direction, offset / 1e9, data
+
+
+async def replay(records, endpoint, speed=1.0):
+    """Feed the inbound records of a capture into a CrestronXsig endpoint
+
+    speed scales the recorded timing (2 replays twice as fast); 0 replays
+    as fast as possible.  Returns the number of bytes replayed.
+    """
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    replayed = 0
+    parser = XsigParser()
+    for direction, offset, data in records:
+        if direction != INBOUND:
+            continue
+        if speed:
+            delay = start + offset / speed - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+        await endpoint.feed(data, parser)
+        replayed += len(data)
+    return replayed
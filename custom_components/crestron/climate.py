@@ -2,7 +2,6 @@
 
 import voluptuous as vol
 import logging
-from asyncio import sleep
 from functools import cached_property
 
 import homeassistant.helpers.config_validation as cv
@@ -17,9 +16,10 @@ from homeassistant.components.climate import (
 
 from homeassistant.const import CONF_NAME
 
+from . import get_endpoint
 from .const import (
-    HUB,
-    DOMAIN,
+    DEFAULT_ENDPOINT,
+    CONF_ENDPOINT,
     CONF_HEAT_SP_JOIN,
     CONF_COOL_SP_JOIN,
     CONF_REG_TEMP_JOIN,
@@ -35,12 +35,14 @@ from .const import (
     CONF_C2_JOIN,
     CONF_FA_JOIN,
 )
+from .entity import CrestronEntity
 
 _LOGGER = logging.getLogger(__name__)
 
 PLATFORM_SCHEMA = vol.Schema(
     {
         vol.Required(CONF_NAME): cv.string,
+        vol.Optional(CONF_ENDPOINT): cv.string,
         vol.Required(CONF_HEAT_SP_JOIN): cv.positive_int,
         vol.Required(CONF_COOL_SP_JOIN): cv.positive_int,           
         vol.Required(CONF_REG_TEMP_JOIN): cv.positive_int,
@@ -63,14 +65,13 @@ async def async_setup_platform(hass, config, async_add_entities, discovery_info=
     if not config or len(config) <= 1:
         return
 
-    hub = hass.data[DOMAIN][HUB]
+    hub = get_endpoint(hass, config.get(CONF_ENDPOINT, DEFAULT_ENDPOINT))
     entity = [CrestronThermostat(hub, config, hass.config.units.temperature_unit)]
     async_add_entities(entity)
 
 
-class CrestronThermostat(ClimateEntity):
+class CrestronThermostat(CrestronEntity, ClimateEntity):
     def __init__(self, hub, config, unit):
-        self._hub = hub
         self._hvac_modes = [
             HVACMode.HEAT_COOL,
             HVACMode.HEAT,
@@ -97,19 +98,34 @@ class CrestronThermostat(ClimateEntity):
         self._c1_join = config[CONF_C1_JOIN]
         self._c2_join = config.get(CONF_C2_JOIN)
         self._fa_join = config[CONF_FA_JOIN]
-
-    async def async_added_to_hass(self):
-        self._hub.register_callback(self.process_callback)
-
-    async def async_will_remove_from_hass(self):
-        self._hub.remove_callback(self.process_callback)
-
-    async def process_callback(self, cbtype, value):
-        self.async_write_ha_state()
-
-    @property
-    def available(self):
-        return self._hub.is_available()
+        joins = [
+            ("a", self._heat_sp_join),
+            ("a", self._cool_sp_join),
+            ("a", self._reg_temp_join),
+            ("d", self._mode_heat_join),
+            ("d", self._mode_cool_join),
+            ("d", self._mode_auto_join),
+            ("d", self._mode_off_join),
+            ("d", self._fan_on_join),
+            ("d", self._fan_auto_join),
+            ("d", self._h1_join),
+            ("d", self._c1_join),
+        ]
+        if self._h2_join:
+            joins.append(("d", self._h2_join))
+        if self._c2_join:
+            joins.append(("d", self._c2_join))
+        super().__init__(hub, joins)
+
+    def _derived_state(self):
+        return (
+            self.current_temperature,
+            self.target_temperature_high,
+            self.target_temperature_low,
+            self.hvac_mode,
+            self.fan_mode,
+            self.hvac_action,
+        )
 
     @property
     def name(self):
@@ -137,72 +153,62 @@ class CrestronThermostat(ClimateEntity):
 
     @property
     def current_temperature(self):
-        return self._hub.get_analog(self._reg_temp_join) / 10
+        return self._analogs[self._reg_temp_join] / 10
 
     @property
     def target_temperature_high(self):
-        return self._hub.get_analog(self._cool_sp_join) / 10
+        return self._analogs[self._cool_sp_join] / 10
 
     @property
     def target_temperature_low(self):
-        return self._hub.get_analog(self._heat_sp_join) / 10
+        return self._analogs[self._heat_sp_join] / 10
 
     @property
     def hvac_mode(self):
-        if self._hub.get_digital(self._mode_auto_join):
+        digitals = self._digitals
+        if digitals[self._mode_auto_join]:
             return HVACMode.HEAT_COOL
-        if self._hub.get_digital(self._mode_heat_join):
+        if digitals[self._mode_heat_join]:
             return HVACMode.HEAT
-        if self._hub.get_digital(self._mode_cool_join):
+        if digitals[self._mode_cool_join]:
             return HVACMode.COOL
-        if self._hub.get_digital(self._mode_off_join):
+        if digitals[self._mode_off_join]:
             return HVACMode.OFF
         return None
 
     @property
     def fan_mode(self):
-        if self._hub.get_digital(self._fan_auto_join):
+        if self._digitals[self._fan_auto_join]:
             return FAN_AUTO
-        if self._hub.get_digital(self._fan_on_join):
+        if self._digitals[self._fan_on_join]:
             return FAN_ON
         return None
 
     @property
     def hvac_action(self):
-        if self._hub.get_digital(self._h1_join) or (self._h2_join and self._hub.get_digital(self._h2_join)):
+        digitals = self._digitals
+        if digitals[self._h1_join] or digitals.get(self._h2_join):
             return HVACAction.HEATING
-        elif self._hub.get_digital(self._c1_join) or (self._c2_join and self._hub.get_digital(self._c2_join)):
+        elif digitals[self._c1_join] or digitals.get(self._c2_join):
             return HVACAction.COOLING
         else:
             return HVACAction.IDLE
 
     async def async_set_hvac_mode(self, hvac_mode):
         if hvac_mode == HVACMode.HEAT_COOL:
-            self._hub.set_digital(self._mode_auto_join, True)
-            await sleep(0.05)
-            self._hub.set_digital(self._mode_auto_join, False)
+            self._hub.pulse_digital(self._mode_auto_join)
         elif hvac_mode == HVACMode.HEAT:
-            self._hub.set_digital(self._mode_heat_join, True)
-            await sleep(0.05)
-            self._hub.set_digital(self._mode_heat_join, False)
+            self._hub.pulse_digital(self._mode_heat_join)
         elif hvac_mode == HVACMode.COOL:
-            self._hub.set_digital(self._mode_cool_join, True)
-            await sleep(0.05)
-            self._hub.set_digital(self._mode_cool_join, False)
+            self._hub.pulse_digital(self._mode_cool_join)
         elif hvac_mode == HVACMode.OFF:
-            self._hub.set_digital(self._mode_off_join, True)
-            await sleep(0.05)
-            self._hub.set_digital(self._mode_off_join, False)
+            self._hub.pulse_digital(self._mode_off_join)
 
     async def async_set_fan_mode(self, fan_mode):
         if fan_mode == FAN_AUTO:
-            self._hub.set_digital(self._fan_auto_join, True)
-            await sleep(0.05)
-            self._hub.set_digital(self._fan_auto_join, False)
+            self._hub.pulse_digital(self._fan_auto_join)
         elif fan_mode == FAN_ON:
-            self._hub.set_digital(self._fan_on_join, True)
-            await sleep(0.05)
-            self._hub.set_digital(self._fan_on_join, False)
+            self._hub.pulse_digital(self._fan_on_join)
 
     async def async_set_temperature(self, **kwargs):
         if "target_temp_low" in kwargs:
@@ -0,0 +1,203 @@
+"""Encoder and decoder for Crestron XSIG frames
+
+This module has no Home Assistant dependencies so it can be used (and
+benchmarked) on its own.
+"""
+
+import re
+import struct
+
+FRAME_SYNC = "sync"
+FRAME_UNKNOWN = "unknown"
+FRAME_DIGITAL = "d"
+FRAME_ANALOG = "a"
+FRAME_SERIAL = "s"
+
+MAX_SERIAL_LENGTH = 252
+# Longest inbound serial payload in bytes: MAX_SERIAL_LENGTH 4-byte characters
+MAX_SERIAL_PAYLOAD = MAX_SERIAL_LENGTH * 4
+
+_DIGITAL = struct.Struct(">BB")
+_ANALOG = struct.Struct(">BBBB")
+_SERIAL_HEADER = struct.Struct(">BB")
+
+# A sync byte, or a digital, analog or serial header byte followed by a data byte
+_FRAME_START = re.compile(rb"\xfb|[\x80-\xd7\xe0-\xe7\xf0-\xf7][\x00-\x7f]")
+
+
+def encode_digital(join, value):
+    """Encode a digital join frame"""
+    return _DIGITAL.pack(
+        0b10000000 | (~value << 5 & 0b00100000) | (join - 1) >> 7,
+        (join - 1) & 0b01111111,
+    )
+
+
+def encode_analog(join, value):
+    """Encode an analog join frame"""
+    return _ANALOG.pack(
+        0b11000000 | (value >> 10 & 0b00110000) | (join - 1) >> 7,
+        (join - 1) & 0b01111111,
+        value >> 7 & 0b01111111,
+        value & 0b01111111,
+    )
+
+
+def encode_serial(join, string):
+    """Encode a serial join frame"""
+    return (
+        _SERIAL_HEADER.pack(0b11001000 | ((join - 1) >> 7), (join - 1) & 0b01111111)
+        + string.encode()
+        + b"\xff"
+    )
+
+
+ENCODERS = {
+    FRAME_DIGITAL: encode_digital,
+    FRAME_ANALOG: encode_analog,
+    FRAME_SERIAL: encode_serial,
+}
+
+
+def encode_many(updates):
+    """Encode a list of (type, join, value) updates into one bytearray
+
+    The buffer is sized up front and every frame is packed into it in place.
+    """
+    encoded = []
+    size = 0
+    for frame_type, join, value in updates:
+        if frame_type == FRAME_SERIAL:
+            value = value.encode()
+            size += len(value) + 3
+        elif frame_type == FRAME_ANALOG:
+            size += 4
+        else:
+            size += 2
+        encoded.append((frame_type, join, value))
+
+    buffer = bytearray(size)
+    pos = 0
+    for frame_type, join, value in encoded:
+        if frame_type == FRAME_DIGITAL:
+            _DIGITAL.pack_into(
+                buffer,
+                pos,
+                0b10000000 | (~value << 5 & 0b00100000) | (join - 1) >> 7,
+                (join - 1) & 0b01111111,
+            )
+            pos += 2
+        elif frame_type == FRAME_ANALOG:
+            _ANALOG.pack_into(
+                buffer,
+                pos,
+                0b11000000 | (value >> 10 & 0b00110000) | (join - 1) >> 7,
+                (join - 1) & 0b01111111,
+                value >> 7 & 0b01111111,
+                value & 0b01111111,
+            )
+            pos += 4
+        else:
+            _SERIAL_HEADER.pack_into(
+                buffer,
+                pos,
+                0b11001000 | ((join - 1) >> 7),
+                (join - 1) & 0b01111111,
+            )
+            pos += 2
+            end = pos + len(value)
+            buffer[pos:end] = value
+            buffer[end] = 0xFF
+            pos = end + 1
+    return buffer
+
+
+def decode_into(buffer, frames, start=0, max_serial=MAX_SERIAL_PAYLOAD):
+    """Decode complete frames from buffer, appending (type, join, value) to frames
+
+    Bytes that are not a valid frame header, and serial frames with no
+    terminator within max_serial bytes, are skipped up to the next plausible
+    frame start and reported as one FRAME_UNKNOWN frame whose value is the
+    skipped bytes.  buffer is a bytes or bytearray object.  Serial payloads
+    are decoded straight from a memoryview of it rather than from sliced
+    copies; invalid UTF-8 is replaced rather than raising.
+    Returns the offset of the first byte that is not part of a complete
+    frame, so the caller can keep any partial frame for the next read.
+    """
+    end = len(buffer)
+    pos = start
+    with memoryview(buffer) as view:
+        while pos < end:
+            b0 = buffer[pos]
+            # Sync all joins request
+            if b0 == 0xFB:
+                frames.append((FRAME_SYNC, None, None))
+                pos += 1
+                continue
+            if pos + 1 >= end:
+                break
+            b1 = buffer[pos + 1]
+            if b1 & 0b10000000:
+                pos = _skip_garbage(buffer, view, frames, pos, end)
+            # Digital Join
+            elif b0 & 0b11000000 == 0b10000000:
+                join = ((b0 & 0b00011111) << 7 | b1) + 1
+                frames.append((FRAME_DIGITAL, join, ~b0 >> 5 & 0b1))
+                pos += 2
+            # Analog Join
+            elif b0 & 0b11001000 == 0b11000000:
+                if pos + 3 >= end:
+                    break
+                join = ((b0 & 0b00000111) << 7 | b1) + 1
+                value = (
+                    (b0 & 0b00110000) << 10 | buffer[pos + 2] << 7 | buffer[pos + 3]
+                )
+                frames.append((FRAME_ANALOG, join, value))
+                pos += 4
+            # Serial Join
+            elif b0 & 0b11111000 == 0b11001000:
+                terminator = buffer.find(b"\xff", pos + 2, pos + 3 + max_serial)
+                if terminator < 0:
+                    if end - pos - 2 <= max_serial:
+                        break
+                    pos = _skip_garbage(buffer, view, frames, pos, end)
+                    continue
+                join = ((b0 & 0b00000111) << 7 | b1) + 1
+                string = str(view[pos + 2 : terminator], "utf-8", "replace")
+                frames.append((FRAME_SERIAL, join, string))
+                pos = terminator + 1
+            else:
+                pos = _skip_garbage(buffer, view, frames, pos, end)
+    return pos
+
+
+class XsigParser:
+    """Incremental decoder for the XSIG byte stream
+
+    Data is fed in arbitrarily sized chunks.  Every complete frame in the
+    buffer is decoded and partial frames are kept until the next chunk.
+    """
+
+    def __init__(self):
+        """Initialize XsigParser object"""
+        self._buffer = bytearray()
+
+    def feed(self, data):
+        """Append data and return a list of (type, join, value) frames"""
+        buf = self._buffer
+        buf += data
+        frames = []
+        del buf[: decode_into(buf, frames)]
+        return frames
+
+
+def _skip_garbage(buffer, view, frames, pos, end):
+    """Report the bytes from pos up to the next plausible frame start as unknown
+
+    Returns the position to resume decoding at.  When no frame start is
+    found the last byte is kept, as it may be the first half of a header.
+    """
+    match = _FRAME_START.search(buffer, pos + 1)
+    resume = match.start() if match else max(pos + 1, end - 1)
+    frames.append((FRAME_UNKNOWN, None, bytes(view[pos:resume])))
+    return resume
@@ -1,6 +1,20 @@
 HUB = "hub"
+ENDPOINTS = "endpoints"
+DEFAULT_ENDPOINT = "default"
 DOMAIN = "crestron"
 CONF_PORT = "port"
+CONF_ENDPOINTS = "endpoints"
+CONF_ENDPOINT = "endpoint"
+CONF_STATE_WRITE_WINDOW = "state_write_window"
+CONF_WRITE_HIGH_WATER = "write_high_water"
+CONF_TRACE_SIZE = "trace_size"
+CONF_ANALOG_MIN_INTERVAL = "analog_min_interval"
+CONF_DISPATCH_UNCHANGED = "dispatch_unchanged"
+CONF_SNAPSHOT_INTERVAL = "snapshot_interval"
+CONF_IDLE_TIMEOUT = "idle_timeout"
+CONF_HEARTBEAT_JOIN = "heartbeat_join"
+CONF_QUEUE_POLICY = "queue_policy"
+CONF_ALWAYS_SEND = "always_send"
 CONF_TO_HUB = "to_joins"
 CONF_FROM_HUB = "from_joins"
 CONF_JOIN = "join"
@@ -42,5 +56,15 @@ CONF_SWITCH_JOIN = "switch_join"
 CONF_PULSED = "pulsed"
 CONF_GET_ANALOG = "get_analog"
 CONF_GET_DIGITAL = "get_digital"
+CONF_GET_SERIAL = "get_serial"
 CONF_SET_ANALOG = "set_analog"
 CONF_SET_DIGITAL = "set_digital"
+CONF_START_CAPTURE = "start_capture"
+CONF_STOP_CAPTURE = "stop_capture"
+CONF_STATS = "stats"
+CONF_SET_JOINS = "set_joins"
+CONF_GET_JOINS = "get_joins"
+CONF_JOINS = "joins"
+CONF_RESET = "reset"
+CONF_TRACE = "trace"
+CONF_CLEAR = "clear"
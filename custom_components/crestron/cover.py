@@ -5,28 +5,30 @@ import logging
 import voluptuous as vol
 
 import homeassistant.helpers.config_validation as cv
-from homeassistant.helpers.event import call_later
 from homeassistant.components.cover import (
     CoverDeviceClass,
     CoverEntity,
     CoverEntityFeature,
 )
 from homeassistant.const import CONF_NAME, CONF_TYPE
+from . import get_endpoint
 from .const import (
-    HUB,
-    DOMAIN,
+    DEFAULT_ENDPOINT,
+    CONF_ENDPOINT,
     CONF_IS_OPENING_JOIN,
     CONF_IS_CLOSING_JOIN,
     CONF_IS_CLOSED_JOIN,
     CONF_STOP_JOIN,
     CONF_POS_JOIN,
 )
+from .entity import CrestronEntity
 
 _LOGGER = logging.getLogger(__name__)
 
 PLATFORM_SCHEMA = vol.Schema(
     {
         vol.Required(CONF_NAME): cv.string,
+        vol.Optional(CONF_ENDPOINT): cv.string,
         vol.Required(CONF_TYPE): cv.string,
         vol.Required(CONF_POS_JOIN): cv.positive_int,
         vol.Required(CONF_IS_OPENING_JOIN): cv.positive_int,
@@ -42,14 +44,13 @@ async def async_setup_platform(hass, config, async_add_entities, discovery_info=
     if not config or len(config) <= 1:
         return
 
-    hub = hass.data[DOMAIN][HUB]
+    hub = get_endpoint(hass, config.get(CONF_ENDPOINT, DEFAULT_ENDPOINT))
     entity = [CrestronShade(hub, config)]
     async_add_entities(entity)
 
 
-class CrestronShade(CoverEntity):
+class CrestronShade(CrestronEntity, CoverEntity):
     def __init__(self, hub, config):
-        self._hub = hub
         if config.get(CONF_TYPE) == "shade":
             self._device_class = CoverDeviceClass.SHADE
             self._supported_features = (
@@ -67,19 +68,23 @@ class CrestronShade(CoverEntity):
         self._is_closed_join = config.get(CONF_IS_CLOSED_JOIN)
         self._stop_join = config.get(CONF_STOP_JOIN)
         self._pos_join = config.get(CONF_POS_JOIN)
-
-    async def async_added_to_hass(self):
-        self._hub.register_callback(self.process_callback)
-
-    async def async_will_remove_from_hass(self):
-        self._hub.remove_callback(self.process_callback)
-
-    async def process_callback(self, cbtype, value):
-        self.async_write_ha_state()
-
-    @property
-    def available(self):
-        return self._hub.is_available()
+        super().__init__(
+            hub,
+            [
+                ("a", self._pos_join),
+                ("d", self._is_opening_join),
+                ("d", self._is_closing_join),
+                ("d", self._is_closed_join),
+            ],
+        )
+
+    def _derived_state(self):
+        return (
+            self.current_cover_position,
+            self.is_opening,
+            self.is_closing,
+            self.is_closed,
+        )
 
     @property
     def name(self):
@@ -99,19 +104,19 @@ class CrestronShade(CoverEntity):
 
     @property
     def current_cover_position(self):
-        return self._hub.get_analog(self._pos_join) / 655.35
+        return self._analogs[self._pos_join] / 655.35
 
     @property
     def is_opening(self):
-        return self._hub.get_digital(self._is_opening_join)
+        return self._digitals[self._is_opening_join]
 
     @property
     def is_closing(self):
-        return self._hub.get_digital(self._is_closing_join)
+        return self._digitals[self._is_closing_join]
 
     @property
     def is_closed(self):
-        return self._hub.get_digital(self._is_closed_join)
+        return self._digitals[self._is_closed_join]
 
     async def async_set_cover_position(self, **kwargs):
         self._hub.set_analog(self._pos_join, int(kwargs["position"]) * 655)
@@ -123,5 +128,4 @@ class CrestronShade(CoverEntity):
         self._hub.set_analog(self._pos_join, 0)
 
     async def async_stop_cover(self, **kwargs):
-        self._hub.set_digital(self._stop_join, 1)
-        call_later(self.hass, 0.2, self._hub.set_digital(self._stop_join, 0))
+        self._hub.pulse_digital(self._stop_join, 0.2)
@@ -1,45 +1,171 @@
 import asyncio
-import struct
+import heapq
 import logging
+import socket
+import time
+
+from .codec import (
+    FRAME_ANALOG,
+    FRAME_DIGITAL,
+    FRAME_SERIAL,
+    FRAME_SYNC,
+    FRAME_UNKNOWN,
+    MAX_SERIAL_LENGTH,
+    XsigParser,
+    encode_analog,
+    encode_digital,
+    encode_many,
+    encode_serial,
+)
+from .capture import INBOUND, OUTBOUND
+from .stats import XsigStats
+from .store import JoinStore
+from .trace import DEFAULT_TRACE_SIZE, FrameTrace
 
 _LOGGER = logging.getLogger(__name__)
 
+READ_CHUNK_SIZE = 65536
+DEFAULT_WRITE_HIGH_WATER = 65536
+DEFAULT_PULSE_SECONDS = 0.05
+DEFAULT_ANALOG_MIN_INTERVAL = 0.1
+
+# A silent peer is probed after KEEPALIVE_IDLE seconds and dropped after
+# KEEPALIVE_COUNT unanswered probes KEEPALIVE_INTERVAL seconds apart
+KEEPALIVE_IDLE = 10
+KEEPALIVE_INTERVAL = 5
+KEEPALIVE_COUNT = 3
+
+QUEUE_DISCARD = "discard"
+QUEUE_HOLD = "hold"
+
+
+class XsigServer:
+    """TCP server that hands control system connections to CrestronXsig endpoints
+
+    Several endpoints can share one port when each is bound to the address of
+    a different control system.  An endpoint bound to no address accepts
+    connections from any peer that has no endpoint of its own.
+    """
+
+    def __init__(self, port):
+        """Initialize XsigServer object"""
+        self.port = port
+        self._endpoints = {}
+        self._server = None
+
+    def add_endpoint(self, endpoint, host=None):
+        """Route connections from host (or any other peer if None) to endpoint"""
+        if host in self._endpoints:
+            raise ValueError(
+                f"Port {self.port} already has an endpoint for {host or 'any host'}"
+            )
+        self._endpoints[host] = endpoint
+
+    async def start(self):
+        """Start listening for control system connections"""
+        self._server = await asyncio.start_server(
+            self._handle_connection, "0.0.0.0", self.port
+        )
+        addr = self._server.sockets[0].getsockname()
+        _LOGGER.info(f"Listening on {addr}:{self.port}")
+
+    async def stop(self):
+        """Stop listening"""
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+            _LOGGER.info("TCP connection successfully closed")
+            self._server = None
+
+    async def _handle_connection(self, reader, writer):
+        """Pass a new connection to the endpoint bound to its peer address"""
+        peer = writer.get_extra_info("peername")
+        endpoint = self._endpoints.get(peer[0] if peer else None)
+        if endpoint is None:
+            endpoint = self._endpoints.get(None)
+        if endpoint is None:
+            _LOGGER.warning(
+                f"Rejecting connection from {peer}: no endpoint on port {self.port}"
+            )
+            writer.close()
+            return
+        await endpoint.handle_connection(reader, writer)
+
 
 class CrestronXsig:
-    def __init__(self):
+    def __init__(
+        self,
+        name="default",
+        state_write_window=0,
+        write_high_water=DEFAULT_WRITE_HIGH_WATER,
+        trace_size=DEFAULT_TRACE_SIZE,
+        analog_min_interval=DEFAULT_ANALOG_MIN_INTERVAL,
+        idle_timeout=0,
+        heartbeat_join=None,
+        queue_policy=QUEUE_DISCARD,
+    ):
         """Initialize CrestronXsig object"""
-        self._digital = {}
-        self._analog = {}
-        self._serial = {}
+        self.name = name
+        self._joins = JoinStore()
         self._writer = None
+        self._peer = None
+        self._capture = None
+        self.stats = XsigStats()
+        self.trace = FrameTrace(trace_size) if trace_size else None
         self._callbacks = set()
+        self._subscriptions = {}
+        self._subscribers = {}
         self._server = None
         self._available = False
         self._sync_all_joins_callback = None
+        self._state_write_window = state_write_window
+        self._pending_state_writes = {}
+        self._state_write_handle = None
+        self._write_high_water = write_high_water
+        self._outbound = []
+        self._outbound_size = 0
+        self._outbound_handle = None
+        self._outbound_overflow = False
+        self._drain_task = None
+        self._sent = {}
+        self._always_send = set()
+        self._dispatch_unchanged = set()
+        self._restored = False
+        self._joins_dirty = False
+        self._idle_timeout = idle_timeout
+        self._idle_handle = None
+        self._last_read = 0
+        self._heartbeat_join = heartbeat_join
+        self._heartbeat_value = False
+        self._hold_outbound = queue_policy == QUEUE_HOLD
+        self._pulses = []
+        self._pulse_releases = {}
+        self._pulse_handle = None
+        self._analog_min_interval = analog_min_interval
+        self._analog_ready = {}
+        self._analog_pending = {}
 
     async def listen(self, port):
         """Start TCP XSIG server listening on configured port"""
-        self._server = await asyncio.start_server(
-            self.handle_connection, "0.0.0.0", port
-        )
-        addr = self._server.sockets[0].getsockname()
-        _LOGGER.info(f"Listening on {addr}:{port}")
+        self._server = XsigServer(port)
+        self._server.add_endpoint(self)
+        await self._server.start()
 
     async def stop(self):
         """Stop TCP XSIG server"""
         self._available = False
 
-        if self._callbacks:
+        callbacks = self._callbacks.union(self._subscribers)
+        if callbacks:
             await asyncio.gather(
-                *(callback("available", "False") for callback in self._callbacks)
+                *(callback("available", "False") for callback in callbacks)
             )
 
         _LOGGER.info("Stop called. Closing TCP connection")
+        self._close_connection()
 
         if self._server:
-            self._server.close()
-            await self._server.wait_closed()
-            _LOGGER.info("TCP connection successfully closed")
+            await self._server.stop()
             self._server = None
 
     def register_sync_all_joins_callback(self, callback):
@@ -48,141 +174,675 @@ class CrestronXsig:
         self._sync_all_joins_callback = callback
 
     def register_callback(self, callback):
-        """Allow callbacks to be registered for when dict entries change"""
+        """Allow callbacks to be registered for every join change"""
         self._callbacks.add(callback)
 
     def remove_callback(self, callback):
         """Allow callbacks to be de-registered"""
         self._callbacks.discard(callback)
 
+    def subscribe(self, joins, callback):
+        """Register callback for changes to the given (type, join) keys, e.g. ("a", 12)
+
+        Subscribers are also notified when availability changes.
+        """
+        joins = set(joins)
+        for key in joins:
+            self._subscriptions.setdefault(key, set()).add(callback)
+        self._subscribers.setdefault(callback, set()).update(joins)
+
+    def unsubscribe(self, callback):
+        """De-register callback from every join it is subscribed to"""
+        for key in self._subscribers.pop(callback, ()):
+            subscribers = self._subscriptions.get(key)
+            if subscribers is not None:
+                subscribers.discard(callback)
+                if not subscribers:
+                    del self._subscriptions[key]
+
+    def schedule_state_write(self, write):
+        """Coalesce entity state writes
+
+        Each distinct write callback is called at most once per event loop
+        tick, or once per state_write_window seconds when one is configured.
+        """
+        self._pending_state_writes[write] = None
+        if self._state_write_handle is None:
+            loop = asyncio.get_running_loop()
+            if self._state_write_window:
+                self._state_write_handle = loop.call_later(
+                    self._state_write_window, self._flush_state_writes
+                )
+            else:
+                self._state_write_handle = loop.call_soon(self._flush_state_writes)
+
+    def cancel_state_write(self, write):
+        """Drop a pending state write, e.g. for an entity being removed"""
+        self._pending_state_writes.pop(write, None)
+
+    def _flush_state_writes(self):
+        """Call every pending state write once"""
+        self._state_write_handle = None
+        writes = self._pending_state_writes
+        self._pending_state_writes = {}
+        for write in writes:
+            try:
+                write()
+            except Exception:
+                _LOGGER.exception("Error writing entity state")
+
+    async def _notify(self, key, cbtype, value):
+        """Call global callbacks and the subscribers of a single join"""
+        for callback in tuple(self._callbacks):
+            await callback(cbtype, value)
+        subscribers = self._subscriptions.get(key)
+        if subscribers:
+            for callback in tuple(subscribers):
+                await callback(cbtype, value)
+
+    async def _notify_available(self, value):
+        """Tell all callbacks and subscribers about an availability change"""
+        for callback in self._callbacks.union(self._subscribers):
+            await callback("available", value)
+
     async def handle_connection(self, reader, writer):
         """Parse packets from Crestron XSIG symbol"""
-        self._writer = writer
         peer = writer.get_extra_info("peername")
-        _LOGGER.info(f"Control system connection from {peer}")
+        if self._writer is not None:
+            _LOGGER.warning(
+                f"Control system connection from {peer} to {self.name} "
+                f"replaces connection from {self._peer}"
+            )
+            self._close_connection(hold=self._hold_outbound)
+        self._writer = writer
+        self._peer = peer
+        self._restored = False
+        self.stats.connections += 1
+        self._sent.clear()
+        writer.transport.set_write_buffer_limits(high=self._write_high_water)
+        self._set_socket_options(writer.get_extra_info("socket"))
+        _LOGGER.info(f"Control system connection from {peer} to {self.name}")
         _LOGGER.debug("Sending update request")
-        writer.write(b"\xfd")
+        self._send(b"\xfd")
         self._available = True
-        for callback in self._callbacks:
-            await callback("available", "True")
-
-        connected = True
-        while connected:
-            data = await reader.read(1)
-            if data:
-                # Sync all joins request
-                if data[0] == 0xFB:
-                    _LOGGER.debug("Got update all joins request")
-                    if self._sync_all_joins_callback is not None:
-                        await self._sync_all_joins_callback()
-                        _LOGGER.debug("Calling sync-all-joins callback")
-                else:
-                    data += await reader.read(1)
-                    # Digital Join
-                    if (
-                        data[0] & 0b11000000 == 0b10000000
-                        and data[1] & 0b10000000 == 0b00000000
-                    ):
-                        header = struct.unpack("BB", data)
-                        join = ((header[0] & 0b00011111) << 7 | header[1]) + 1
-                        value = ~header[0] >> 5 & 0b1
-                        self._digital[join] = True if value == 1 else False
-                        _LOGGER.debug(f"Got Digital: {join} = {value}")
-                        for callback in self._callbacks:
-                            await callback(f"d{join}", str(value))
-                    # Analog Join
-                    elif (
-                        data[0] & 0b11001000 == 0b11000000
-                        and data[1] & 0b10000000 == 0b00000000
-                    ):
-                        data += await reader.read(2)
-                        header = struct.unpack("BBBB", data)
-                        join = ((header[0] & 0b00000111) << 7 | header[1]) + 1
-                        value = (
-                            (header[0] & 0b00110000) << 10 | header[2] << 7 | header[3]
-                        )
-                        self._analog[join] = value
-                        _LOGGER.debug(f"Got Analog: {join} = {value}")
-                        for callback in self._callbacks:
-                            await callback(f"a{join}", str(value))
-                    # Serial Join
-                    elif (
-                        data[0] & 0b11111000 == 0b11001000
-                        and data[1] & 0b10000000 == 0b00000000
-                    ):
-                        data += await reader.readuntil(b"\xff")
-                        header = struct.unpack("BB", data[:2])
-                        join = ((header[0] & 0b00000111) << 7 | header[1]) + 1
-                        string = data[2:-1].decode("utf-8")
-                        self._serial[join] = string
-                        _LOGGER.debug(f"Got String: {join} = {string}")
-                        for callback in self._callbacks:
-                            await callback(f"s{join}", string)
-                    else:
-                        _LOGGER.debug(f"Unknown Packet: {data.hex()}")
-            else:
-                _LOGGER.info("Control system disconnected")
-                connected = False
-                self._available = False
-                for callback in self._callbacks:
-                    await callback("available", "False")
+        await self._notify_available("True")
+
+        # A replaced connection may still be reading; it keeps its own parser
+        parser = XsigParser()
+        loop = asyncio.get_running_loop()
+        self._last_read = loop.time()
+        if self._idle_timeout and self._heartbeat_join:
+            self._idle_handle = loop.call_later(
+                self._idle_check_interval(), self._check_idle, writer
+            )
+        try:
+            while True:
+                data = await reader.read(READ_CHUNK_SIZE)
+                if not data:
+                    break
+                if self._writer is writer:
+                    self._last_read = loop.time()
+                await self.feed(data, parser)
+        except ConnectionError as err:
+            _LOGGER.info(f"Control system connection from {peer} lost: {err}")
+        finally:
+            writer.close()
+            if self._writer is writer:
+                _LOGGER.info(f"Control system {peer} disconnected from {self.name}")
+                self._close_connection(hold=self._hold_outbound)
+                await self._notify_available("False")
+
+    def _set_socket_options(self, sock):
+        """Enable TCP keepalive so a half-open connection is eventually dropped"""
+        if sock is None:
+            return
+        options = [(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)]
+        for name, value in (
+            ("TCP_KEEPIDLE", KEEPALIVE_IDLE),
+            ("TCP_KEEPINTVL", KEEPALIVE_INTERVAL),
+            ("TCP_KEEPCNT", KEEPALIVE_COUNT),
+        ):
+            if hasattr(socket, name):
+                options.append((socket.IPPROTO_TCP, getattr(socket, name), value))
+        # Give up on unacknowledged writes as quickly as on a silent peer
+        if self._idle_timeout and hasattr(socket, "TCP_USER_TIMEOUT"):
+            options.append(
+                (
+                    socket.IPPROTO_TCP,
+                    socket.TCP_USER_TIMEOUT,
+                    int(self._idle_timeout * 1000),
+                )
+            )
+        for level, option, value in options:
+            try:
+                sock.setsockopt(level, option, value)
+            except OSError as err:
+                _LOGGER.debug("Could not set socket option %s: %s", option, err)
+
+    def _idle_check_interval(self):
+        """Return how often the idle timer runs"""
+        return self._idle_timeout / 3
+
+    def _check_idle(self, writer):
+        """Drop a connection that has been silent for idle_timeout seconds
+
+        The heartbeat join is toggled whenever the link has been quiet for a
+        third of the timeout and the control system program is expected to
+        echo it back, so only a processor that stops answering is dropped.
+        Without a heartbeat join the timer is not started.
+        """
+        self._idle_handle = None
+        if self._writer is not writer:
+            return
+        loop = asyncio.get_running_loop()
+        idle = loop.time() - self._last_read
+        if idle >= self._idle_timeout:
+            _LOGGER.warning(
+                f"No data from control system {self._peer} on {self.name} "
+                f"for {idle:.1f} seconds, closing connection"
+            )
+            # abort() rather than close(): a dead peer would never drain the buffer
+            writer.transport.abort()
+            return
+        if idle >= self._idle_check_interval():
+            self._heartbeat_value = not self._heartbeat_value
+            self.set_digital(self._heartbeat_join, self._heartbeat_value)
+        self._idle_handle = loop.call_later(
+            self._idle_check_interval(), self._check_idle, writer
+        )
+
+    async def feed(self, data, parser):
+        """Decode and dispatch a chunk of data received from the control system
+
+        Used by the connection handler and to replay captured traffic.  parser
+        is the XsigParser of the stream data came from, which holds any
+        partial frame until the next chunk.
+        """
+        # Timed per chunk; two clock reads per frame cost more than the decode
+        start = time.perf_counter_ns()
+        stats = self.stats
+        stats.bytes_in += len(data)
+        if self._capture is not None:
+            self._capture.record(INBOUND, data)
+        frames = parser.feed(data)
+        if self.trace is not None:
+            self.trace.record_frames(INBOUND, frames)
+        # Checked per chunk so the level can still be changed at runtime
+        debug = _LOGGER.isEnabledFor(logging.DEBUG)
+        for frame_type, join, value in frames:
+            # A failing callback must not take the connection down with it
+            try:
+                await self._process_frame(frame_type, join, value, debug)
+            except Exception:
+                _LOGGER.exception(
+                    "Error processing %s frame for join %s", frame_type, join
+                )
+        stats.process_ns += time.perf_counter_ns() - start
+
+    def start_capture(self, capture):
+        """Record all traffic of this endpoint to an XsigCapture"""
+        self._capture = capture
+
+    def stop_capture(self):
+        """Stop recording and return the XsigCapture so the caller can close it"""
+        capture = self._capture
+        self._capture = None
+        return capture
+
+    def _close_connection(self, hold=False):
+        """Close the current connection
+
+        Its outbound queue, pending pulse releases and held analog values are
+        discarded, or kept for the next connection if hold is True.
+        """
+        writer = self._writer
+        self._available = False
+        self._writer = None
+        self._peer = None
+        if self._idle_handle is not None:
+            self._idle_handle.cancel()
+            self._idle_handle = None
+        if hold:
+            self._pause_outbound()
+        else:
+            self._clear_outbound()
+            self._clear_pulses()
+            self._clear_analog_pending()
+        if writer is not None:
+            writer.close()
+
+    def _can_send(self):
+        """Return True if frames can be sent now or held for the next connection"""
+        return self._writer is not None or self._hold_outbound
+
+    async def _process_frame(self, frame_type, join, value, debug=False):
+        """Store a decoded frame and notify callbacks, logging it if debug"""
+        stats = self.stats
+        # Sync all joins request
+        if frame_type == FRAME_SYNC:
+            _LOGGER.debug("Got update all joins request")
+            stats.syncs += 1
+            self._sent.clear()
+            if self._sync_all_joins_callback is not None:
+                await self._sync_all_joins_callback()
+                _LOGGER.debug("Calling sync-all-joins callback")
+            return
+        if frame_type == FRAME_UNKNOWN:
+            stats.unknown_packets += 1
+            if debug:
+                _LOGGER.debug("Unknown Packet: %s", value.hex())
+            return
+
+        key = (frame_type, join)
+        # Feedback that differs from what we last sent makes the shadow stale
+        if self._sent.get(key, value) != value:
+            del self._sent[key]
+        if frame_type == FRAME_DIGITAL:
+            stats.digital_in += 1
+            changed = self._joins.set_digital(join, value)
+            if debug:
+                _LOGGER.debug("Got Digital: %s = %s", join, value)
+            cbtype, value = f"d{join}", str(value)
+        elif frame_type == FRAME_ANALOG:
+            stats.analog_in += 1
+            changed = self._joins.set_analog(join, value)
+            if debug:
+                _LOGGER.debug("Got Analog: %s = %s", join, value)
+            cbtype, value = f"a{join}", str(value)
+        else:
+            stats.serial_in += 1
+            changed = self._joins.set_serial(join, value)
+            if debug:
+                _LOGGER.debug("Got String: %s = %s", join, value)
+            cbtype = f"s{join}"
+        # Processors repeat unchanged feedback; only changes are dispatched
+        if not changed and key not in self._dispatch_unchanged:
+            stats.unchanged_in += 1
+            return
+        self._joins_dirty = True
+        stats.dispatches += 1
+        await self._notify(key, cbtype, value)
+
+    def _send(self, data):
+        """Queue encoded frames for the next outbound write
+
+        Frames queued in the same event loop tick go out in a single write.
+        While the transport is above the high-water mark the queue is held
+        until drain() completes; frames that would take a non-empty queue
+        beyond the high-water mark are dropped.  Returns True if data was
+        queued, so callers only record frames that will actually be sent.
+        """
+        # Held analog values go out first so frames stay in the order set
+        if self._analog_pending:
+            self._flush_analog_pending()
+        if (
+            self._outbound
+            and self._outbound_size + len(data) > self._write_high_water
+        ):
+            if not self._outbound_overflow:
+                _LOGGER.warning(
+                    "Outbound queue above %d bytes, dropping frames",
+                    self._write_high_water,
+                )
+                self._outbound_overflow = True
+            return False
+        self._outbound.append(data)
+        self._outbound_size += len(data)
+        if self._outbound_handle is None and self._drain_task is None:
+            self._outbound_handle = asyncio.get_running_loop().call_soon(
+                self._flush_outbound
+            )
+        return True
+
+    def _flush_outbound(self):
+        """Write all queued frames to the transport in one call"""
+        self._outbound_handle = None
+        if not self._outbound or self._writer is None:
+            return
+        data = b"".join(self._outbound)
+        self._outbound.clear()
+        self._outbound_size = 0
+        self._outbound_overflow = False
+        self._writer.write(data)
+        self.stats.bytes_out += len(data)
+        if self._capture is not None:
+            self._capture.record(OUTBOUND, data)
+        if self._writer.transport.get_write_buffer_size() > self._write_high_water:
+            self._drain_task = asyncio.get_running_loop().create_task(
+                self._drain(self._writer)
+            )
+
+    async def _drain(self, writer):
+        """Wait for the transport to drain, then send anything queued meanwhile"""
+        try:
+            await writer.drain()
+        except ConnectionError:
+            return
+        finally:
+            self._drain_task = None
+        self._flush_outbound()
+
+    def _pause_outbound(self):
+        """Stop writing but keep queued frames, e.g. when the connection is lost"""
+        if self._outbound_handle is not None:
+            self._outbound_handle.cancel()
+            self._outbound_handle = None
+        if self._drain_task is not None:
+            self._drain_task.cancel()
+            self._drain_task = None
+
+    def _clear_outbound(self):
+        """Discard queued frames, e.g. when the connection is lost"""
+        self._pause_outbound()
+        self._outbound.clear()
+        self._outbound_size = 0
+        self._outbound_overflow = False
+
+    def set_always_send(self, joins):
+        """Exempt (type, join) keys from redundant-frame suppression"""
+        self._always_send = set(joins)
+
+    def set_dispatch_unchanged(self, joins):
+        """Notify callbacks for (type, join) keys even when the value is unchanged
+
+        Inbound frames that repeat a join's current value are otherwise
+        stored and dropped without notifying anyone.
+        """
+        self._dispatch_unchanged = set(joins)
+
+    def _is_redundant(self, key, value):
+        """Return True if value was already sent for this join"""
+        if key in self._always_send:
+            return False
+        return key in self._sent and self._sent[key] == value
+
+    def queue_depth(self):
+        """Return the number of bytes waiting to be sent to the control system"""
+        depth = self._outbound_size
+        if self._writer is not None:
+            depth += self._writer.transport.get_write_buffer_size()
+        return depth
+
+    def get_stats(self):
+        """Return the traffic counters along with the current connection state"""
+        stats = self.stats.as_dict()
+        stats["available"] = self._available
+        stats["peer"] = self._peer[0] if self._peer else None
+        stats["queue_depth"] = self.queue_depth()
+        return stats
 
     def is_available(self):
         """Returns True if control system is connected"""
         return self._available
 
+    def is_restored(self):
+        """Returns True if join values were restored and nothing has connected yet"""
+        return self._restored
+
+    def restore(self, data):
+        """Load join values saved by dump_joins(), e.g. across a restart"""
+        self._joins.load(data)
+        self._restored = not self._available
+
+    def joins_dirty(self):
+        """Returns True if join values changed since the last dump_joins()"""
+        return self._joins_dirty
+
+    def dump_joins(self):
+        """Return the join values in a JSON-serializable form for restore()"""
+        self._joins_dirty = False
+        return self._joins.dump()
+
     def get_analog(self, join):
         """Return analog value for join"""
-        return self._analog.get(join, 0)
+        return self._joins.get_analog(join)
 
     def get_digital(self, join):
         """Return digital value for join"""
-        return self._digital.get(join, False)
+        return self._joins.get_digital(join)
 
     def get_serial(self, join):
         """Return serial value for join"""
-        return self._serial.get(join, "")
+        return self._joins.get_serial(join)
+
+    def get_analogs(self, joins):
+        """Return analog values for an iterable or range of joins"""
+        return self._joins.get_analogs(joins)
+
+    def get_digitals(self, joins):
+        """Return digital values for an iterable or range of joins"""
+        return self._joins.get_digitals(joins)
+
+    def get_serials(self, joins):
+        """Return serial values for an iterable or range of joins"""
+        return self._joins.get_serials(joins)
+
+    def snapshot(self):
+        """Return a copy of the digital, analog and serial join tables"""
+        return self._joins.snapshot()
+
+    def send_sync(self, updates):
+        """Send a full join sync in a single write
+
+        updates is a list of (type, join, value, frame) tuples where frame is
+        the already encoded frame for that value.
+        """
+        if not self._can_send():
+            _LOGGER.info("Could not send.  No connection to hub")
+            return
+        buffer = bytearray(sum(len(update[3]) for update in updates))
+        pos = 0
+        for update in updates:
+            frame = update[3]
+            end = pos + len(frame)
+            buffer[pos:end] = frame
+            pos = end
+        if not buffer:
+            return
+        if not self._send(buffer):
+            _LOGGER.debug("Dropped sync of %d joins", len(updates))
+            return
+        counts = {FRAME_DIGITAL: 0, FRAME_ANALOG: 0, FRAME_SERIAL: 0}
+        trace = self.trace
+        for frame_type, join, value, _ in updates:
+            counts[frame_type] += 1
+            self._sent[(frame_type, join)] = value
+            if trace is not None:
+                trace.record(OUTBOUND, frame_type, join, value)
+        self.stats.digital_out += counts[FRAME_DIGITAL]
+        self.stats.analog_out += counts[FRAME_ANALOG]
+        self.stats.serial_out += counts[FRAME_SERIAL]
+        _LOGGER.debug("Sent sync of %d joins (%d bytes)", len(updates), len(buffer))
+
+    def set_joins(self, updates):
+        """Send a list of (type, join, value) updates in a single write
+
+        Values already sent are skipped as they are by the single-join
+        setters; analogs bypass conflation and replace any held value.
+        Returns the number of frames sent, which is 0 if every value was
+        already sent, or None if the frames could not be sent because there
+        is no connection or the outbound queue is full.
+        """
+        if not self._can_send():
+            _LOGGER.info("Could not send.  No connection to hub")
+            return None
+        frames = []
+        for frame_type, join, value in updates:
+            if frame_type == FRAME_DIGITAL:
+                value = bool(value)
+            if self._is_redundant((frame_type, join), value):
+                continue
+            if frame_type == FRAME_ANALOG:
+                # The new value supersedes a held one whether or not it is sent
+                pending = self._analog_pending.pop(join, None)
+                if pending is not None:
+                    pending[1].cancel()
+            frames.append((frame_type, join, value))
+        if not frames:
+            return 0
+        if not self._send(encode_many(frames)):
+            _LOGGER.debug("Dropped %d joins", len(frames))
+            return None
+        stats = self.stats
+        trace = self.trace
+        for frame_type, join, value in frames:
+            if frame_type == FRAME_DIGITAL:
+                stats.digital_out += 1
+            elif frame_type == FRAME_ANALOG:
+                stats.analog_out += 1
+            else:
+                stats.serial_out += 1
+            if trace is not None:
+                trace.record(OUTBOUND, frame_type, join, value)
+            self._sent[(frame_type, join)] = value
+        _LOGGER.debug("Sent %d of %d joins", len(frames), len(updates))
+        return len(frames)
 
     def set_analog(self, join, value):
-        """Send Analog Join to Crestron XSIG symbol"""
-        if self._writer:
-            data = struct.pack(
-                ">BBBB",
-                0b11000000 | (value >> 10 & 0b00110000) | (join - 1) >> 7,
-                (join - 1) & 0b01111111,
-                value >> 7 & 0b01111111,
-                value & 0b01111111,
-            )
-            self._writer.write(data)
-            _LOGGER.debug(f"Sending Analog: {join}, {value}")
+        """Send Analog Join to Crestron XSIG symbol
+
+        Writes to a join are conflated: after a frame is sent, further values
+        within analog_min_interval seconds are held and only the latest one is
+        sent when the interval ends, or as soon as any other frame is sent so
+        the control system sees frames in the order they were set.  Joins in
+        always_send are not conflated.
+        """
+        if not self._can_send():
+            _LOGGER.info("Could not send.  No connection to hub")
+            return
+        interval = self._analog_min_interval
+        if interval and (FRAME_ANALOG, join) not in self._always_send:
+            loop = asyncio.get_running_loop()
+            ready = self._analog_ready.get(join, 0)
+            if loop.time() < ready:
+                pending = self._analog_pending.get(join)
+                if pending is None:
+                    self._analog_pending[join] = [
+                        value,
+                        loop.call_at(ready, self._flush_analog_pending),
+                    ]
+                else:
+                    pending[0] = value
+                return
+            self._analog_ready[join] = loop.time() + interval
+        self._send_analog(join, value)
+
+    def _flush_analog_pending(self):
+        """Send every held analog value now, in the order they were first held
+
+        Called when a held value's interval ends, and before any other frame
+        is queued so held values are not overtaken.
+        """
+        pending = self._analog_pending
+        self._analog_pending = {}
+        ready = asyncio.get_running_loop().time() + self._analog_min_interval
+        for join, (value, handle) in pending.items():
+            handle.cancel()
+            self._analog_ready[join] = ready
+            self._send_analog(join, value)
+
+    def _clear_analog_pending(self):
+        """Drop held analog values along with the connection they were meant for"""
+        for _, handle in self._analog_pending.values():
+            handle.cancel()
+        self._analog_pending.clear()
+        self._analog_ready.clear()
+
+    def _send_analog(self, join, value):
+        """Send an analog frame unless it repeats the last value sent"""
+        if self._can_send():
+            key = (FRAME_ANALOG, join)
+            if self._is_redundant(key, value):
+                return
+            if not self._send(encode_analog(join, value)):
+                return
+            self.stats.analog_out += 1
+            if self.trace is not None:
+                self.trace.record(OUTBOUND, FRAME_ANALOG, join, value)
+            self._sent[key] = value
+            _LOGGER.debug("Sending Analog: %s, %s", join, value)
         else:
             _LOGGER.info("Could not send.  No connection to hub")
 
     def set_digital(self, join, value):
         """Send Digital Join to Crestron XSIG symbol"""
-        if self._writer:
-            data = struct.pack(
-                ">BB",
-                0b10000000 | (~value << 5 & 0b00100000) | (join - 1) >> 7,
-                (join - 1) & 0b01111111,
-            )
-            self._writer.write(data)
-            _LOGGER.debug(f"Sending Digital: {join}, {value}")
+        if self._can_send():
+            key = (FRAME_DIGITAL, join)
+            if self._is_redundant(key, bool(value)):
+                return
+            if not self._send(encode_digital(join, value)):
+                return
+            self.stats.digital_out += 1
+            if self.trace is not None:
+                self.trace.record(OUTBOUND, FRAME_DIGITAL, join, value)
+            self._sent[key] = bool(value)
+            _LOGGER.debug("Sending Digital: %s, %s", join, value)
         else:
             _LOGGER.info("Could not send.  No connection to hub")
 
+    def pulse_digital(self, join, duration=DEFAULT_PULSE_SECONDS):
+        """Press a digital join and release it duration seconds later
+
+        Returns immediately.  Releases are driven by a single timer for all
+        joins, so releases falling due together go out in the same write, and
+        the release does not depend on the caller staying alive.  Pulsing a
+        join that is still pressed extends the press.
+        """
+        if not self._can_send():
+            _LOGGER.info("Could not send.  No connection to hub")
+            return
+        self.set_digital(join, True)
+        loop = asyncio.get_running_loop()
+        release = loop.time() + duration
+        self._pulse_releases[join] = release
+        heapq.heappush(self._pulses, (release, join))
+        if self._pulse_handle is not None:
+            if self._pulse_handle.when() <= release:
+                return
+            self._pulse_handle.cancel()
+        self._pulse_handle = loop.call_at(release, self._release_pulses)
+
+    def _release_pulses(self):
+        """Release every pulsed join that is due"""
+        due = self._pulse_handle.when()
+        self._pulse_handle = None
+        pulses = self._pulses
+        while pulses and pulses[0][0] <= due:
+            release, join = heapq.heappop(pulses)
+            # Skip entries superseded by a later pulse of the same join
+            if self._pulse_releases.get(join) == release:
+                del self._pulse_releases[join]
+                self.set_digital(join, False)
+        if pulses:
+            self._pulse_handle = asyncio.get_running_loop().call_at(
+                pulses[0][0], self._release_pulses
+            )
+
+    def _clear_pulses(self):
+        """Forget pending releases along with the connection they were pressed on"""
+        if self._pulse_handle is not None:
+            self._pulse_handle.cancel()
+            self._pulse_handle = None
+        self._pulses.clear()
+        self._pulse_releases.clear()
+
     def set_serial(self, join, string):
         """Send String Join to Crestron XSIG symbol"""
-        if len(string) > 252:
-            _LOGGER.info(f"Could not send. String too long ({len(string)}>252)")
-            return
-        elif self._writer:
-            data = struct.pack(
-                ">BB", 0b11001000 | ((join - 1) >> 7), (join - 1) & 0b01111111
+        if len(string) > MAX_SERIAL_LENGTH:
+            _LOGGER.info(
+                f"Could not send. String too long ({len(string)}>{MAX_SERIAL_LENGTH})"
             )
-            data += string.encode()
-            data += b"\xff"
-            self._writer.write(data)
-            _LOGGER.debug(f"Sending Serial: {join}, {string}")
+            return
+        elif self._can_send():
+            key = (FRAME_SERIAL, join)
+            if self._is_redundant(key, string):
+                return
+            if not self._send(encode_serial(join, string)):
+                return
+            self.stats.serial_out += 1
+            if self.trace is not None:
+                self.trace.record(OUTBOUND, FRAME_SERIAL, join, string)
+            self._sent[key] = string
+            _LOGGER.debug("Sending Serial: %s, %s", join, string)
         else:
             _LOGGER.info("Could not send.  No connection to hub")
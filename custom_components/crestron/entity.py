@@ -0,0 +1,88 @@
+"""Base class for Crestron entities"""
+
+from homeassistant.helpers.entity import Entity
+
+
+class CrestronEntity(Entity):
+    """Entity whose state is derived from a fixed set of joins
+
+    Subclasses pass the (type, join) keys they read to __init__ and read the
+    cached values from _digitals, _analogs and _serials (keyed by join
+    number) instead of querying the hub on every state read.  The base
+    class subscribes to those joins, keeps the cache current and schedules
+    a state write when _derived_state() changes.
+    """
+
+    _attr_should_poll = False
+
+    def __init__(self, hub, joins):
+        """Initialize CrestronEntity object"""
+        self._hub = hub
+        self._joins = list(dict.fromkeys(joins))
+        self._digitals = {}
+        self._analogs = {}
+        self._serials = {}
+        tables = {
+            "d": (self._digitals, hub.get_digital),
+            "a": (self._analogs, hub.get_analog),
+            "s": (self._serials, hub.get_serial),
+        }
+        # Callback type (e.g. "a12") -> (cache, getter, join)
+        self._bindings = {
+            f"{join_type}{join}": (*tables[join_type], join)
+            for join_type, join in self._joins
+        }
+        self._refresh_joins()
+        self._last_state = None
+
+    def _derived_state(self):
+        """Return the values the entity's visible state is derived from
+
+        A join change that leaves this unchanged does not write the state.
+        Subclasses return their computed properties; the default is the raw
+        join values.
+        """
+        return (
+            tuple(self._digitals.values()),
+            tuple(self._analogs.values()),
+            tuple(self._serials.values()),
+        )
+
+    def _refresh_joins(self):
+        """Reload every cached join value from the hub"""
+        for values, getter, join in self._bindings.values():
+            values[join] = getter(join)
+
+    async def async_added_to_hass(self):
+        self._refresh_joins()
+        self._last_state = self._derived_state()
+        self._hub.subscribe(self._joins, self.process_callback)
+
+    async def async_will_remove_from_hass(self):
+        self._hub.unsubscribe(self.process_callback)
+        self._hub.cancel_state_write(self.async_write_ha_state)
+
+    async def process_callback(self, cbtype, value):
+        binding = self._bindings.get(cbtype)
+        if binding is None:
+            # Availability changed; values may have been reset or restored
+            self._refresh_joins()
+            self._last_state = self._derived_state()
+        else:
+            values, getter, join = binding
+            values[join] = getter(join)
+            state = self._derived_state()
+            if state == self._last_state:
+                return
+            self._last_state = state
+        self._hub.schedule_state_write(self.async_write_ha_state)
+
+    @property
+    def available(self):  # type: ignore
+        return self._hub.is_available() or self._hub.is_restored()
+
+    @property
+    def extra_state_attributes(self):  # type: ignore
+        if self._hub.is_restored():
+            return {"restored": True}
+        return None
@@ -7,13 +7,21 @@ import voluptuous as vol
 from homeassistant.components.light import ATTR_BRIGHTNESS, ColorMode, LightEntity
 from homeassistant.const import CONF_NAME, CONF_TYPE
 
-from .const import CONF_BRIGHTNESS_DEFAULT, CONF_BRIGHTNESS_JOIN, DOMAIN, HUB
+from . import get_endpoint
+from .entity import CrestronEntity
+from .const import (
+    CONF_BRIGHTNESS_DEFAULT,
+    CONF_BRIGHTNESS_JOIN,
+    CONF_ENDPOINT,
+    DEFAULT_ENDPOINT,
+)
 
 _LOGGER = logging.getLogger(__name__)
 
 PLATFORM_SCHEMA = vol.Schema(
     {
         vol.Required(CONF_NAME): cv.string,
+        vol.Optional(CONF_ENDPOINT): cv.string,
         vol.Required(CONF_TYPE): cv.string,
         vol.Required(CONF_BRIGHTNESS_JOIN): cv.positive_int,
         vol.Optional(CONF_BRIGHTNESS_DEFAULT, default=230): cv.positive_int,
@@ -26,39 +34,28 @@ async def async_setup_platform(hass, config, async_add_entities, discovery_info=
     if not config or len(config) <= 1:
         return
 
-    hub = hass.data[DOMAIN][HUB]
+    hub = get_endpoint(hass, config.get(CONF_ENDPOINT, DEFAULT_ENDPOINT))
     entity = [CrestronLight(hub, config)]
     async_add_entities(entity)
 
 
-class CrestronLight(LightEntity):
-    _attr_should_poll = False
+class CrestronLight(CrestronEntity, LightEntity):
     _attr_supported_color_modes = {ColorMode.BRIGHTNESS}
     _attr_color_mode = ColorMode.BRIGHTNESS
 
     def __init__(self, hub, config):
-        self._hub = hub
         self._name = config.get(CONF_NAME)
         self._brightness_join = config.get(CONF_BRIGHTNESS_JOIN)
         self._default_brightness = config.get(CONF_BRIGHTNESS_DEFAULT)
         self._attr_name = self._name
+        super().__init__(hub, [("a", self._brightness_join)])
 
-    async def async_added_to_hass(self):
-        self._hub.register_callback(self.process_callback)
-
-    async def async_will_remove_from_hass(self):
-        self._hub.remove_callback(self.process_callback)
-
-    async def process_callback(self, cbtype, value):
-        self.async_write_ha_state()
-
-    @property
-    def available(self):  # type: ignore
-        return self._hub.is_available()
+    def _derived_state(self):
+        return self.brightness
 
     @property
     def brightness(self):  # type: ignore
-        return int(self._hub.get_analog(self._brightness_join) / 257)
+        return int(self._analogs[self._brightness_join] / 257)
 
     @property
     def is_on(self):  # type: ignore
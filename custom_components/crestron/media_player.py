@@ -1,7 +1,6 @@
 """Platform for Crestron Media Player integration."""
 
 import logging
-from asyncio import sleep
 from functools import cached_property
 
 import homeassistant.helpers.config_validation as cv
@@ -16,8 +15,10 @@ from homeassistant.util import slugify
 
 from custom_components.crestron.crestron import CrestronXsig
 
+from . import get_endpoint
 from .const import (
     CONF_DEFAULT_SOURCE,
+    CONF_ENDPOINT,
     CONF_MUTE_JOIN,
     CONF_POWER_OFF_JOIN,
     CONF_POWER_ON_JOIN,
@@ -26,9 +27,9 @@ from .const import (
     CONF_SOURCE_NUM_JOIN,
     CONF_SOURCES,
     CONF_VOLUME_JOIN,
-    DOMAIN,
-    HUB,
+    DEFAULT_ENDPOINT,
 )
+from .entity import CrestronEntity
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -98,6 +99,7 @@ PLATFORM_SCHEMA = vol.All(
     vol.Schema(
         {
             vol.Required(CONF_NAME): cv.string,
+            vol.Optional(CONF_ENDPOINT): cv.string,
             vol.Required(CONF_POWER_ON_JOIN): cv.positive_int,
             vol.Required(CONF_POWER_OFF_JOIN): cv.positive_int,
             vol.Required(CONF_MUTE_JOIN): cv.positive_int,
@@ -118,13 +120,12 @@ async def async_setup_platform(hass, config, async_add_entities, discovery_info=
     if not config or len(config) <= 1:
         return
 
-    hub = hass.data[DOMAIN][HUB]
+    hub = get_endpoint(hass, config.get(CONF_ENDPOINT, DEFAULT_ENDPOINT))
     entity = [CrestronRoom(hub, config)]
     async_add_entities(entity)
 
 
-class CrestronRoom(MediaPlayerEntity):
-    _attr_should_poll = False
+class CrestronRoom(CrestronEntity, MediaPlayerEntity):
     _attr_device_class = MediaPlayerDeviceClass.SPEAKER
     _attr_supported_features = (
         MediaPlayerEntityFeature.SELECT_SOURCE
@@ -135,7 +136,6 @@ class CrestronRoom(MediaPlayerEntity):
     )
 
     def __init__(self, hub: CrestronXsig, config):
-        self._hub = hub
         self._name = config.get(CONF_NAME)
         self._power_on_join = config.get(CONF_POWER_ON_JOIN)
         self._power_off_join = config.get(CONF_POWER_OFF_JOIN)
@@ -151,23 +151,19 @@ class CrestronRoom(MediaPlayerEntity):
             CONF_DEFAULT_SOURCE, config.get(CONF_SOURCE_DEFAULT)
         )
         self._active_source_conflict = None
+        joins = [
+            ("d", self._power_on_join),
+            ("d", self._mute_join),
+            ("a", self._volume_join),
+        ]
+        if self._source_number_join is not None:
+            joins.append(("a", self._source_number_join))
+        else:
+            joins.extend(("d", join) for join in self._source_digital_joins)
+        super().__init__(hub, joins)
 
-    async def async_added_to_hass(self):
-        self._hub.register_callback(self.process_callback)
-
-    async def async_will_remove_from_hass(self):
-        self._hub.remove_callback(self.process_callback)
-
-    async def process_callback(self, cbtype, value):
-        self.async_write_ha_state()
-
-    async def _async_pulse_digital(self, join):
-        """Pulse a digital join, ensuring it is released if cancelled."""
-        self._hub.set_digital(join, True)
-        try:
-            await sleep(PULSE_SECONDS)
-        finally:
-            self._hub.set_digital(join, False)
+    def _derived_state(self):
+        return (self.state, self.source, self.is_volume_muted, self.volume_level)
 
     @cached_property
     def name(self):
@@ -177,10 +173,6 @@ class CrestronRoom(MediaPlayerEntity):
     def unique_id(self):
         return slugify(self._name)
 
-    @property
-    def available(self):  # type: ignore
-        return self._hub.is_available()
-
     @cached_property
     def source_list(self):
         return list(self._sources.values())
@@ -188,13 +180,13 @@ class CrestronRoom(MediaPlayerEntity):
     @property
     def source(self):  # type: ignore
         if self._source_number_join is not None:
-            source_num = self._hub.get_analog(self._source_number_join)
+            source_num = self._analogs[self._source_number_join]
             return self._sources.get(source_num)
 
         active_sources = [
             (join, name)
             for join, name in self._source_digital_joins.items()
-            if self._hub.get_digital(join)
+            if self._digitals[join]
         ]
         if not active_sources:
             self._active_source_conflict = None
@@ -216,25 +208,29 @@ class CrestronRoom(MediaPlayerEntity):
 
     @property
     def state(self):  # type: ignore
-        if self._hub.get_digital(self._power_on_join):
+        if self._digitals[self._power_on_join]:
             return STATE_ON
         return STATE_OFF
 
     @property
     def is_volume_muted(self):  # type: ignore
-        return self._hub.get_digital(self._mute_join)
+        return self._digitals[self._mute_join]
 
     @property
     def volume_level(self):  # type: ignore
-        return self._hub.get_analog(self._volume_join) / 65535
+        return self._analogs[self._volume_join] / 65535
 
     async def async_mute_volume(self, mute):
-        await self._async_pulse_digital(self._mute_join)
+        self._hub.pulse_digital(self._mute_join, PULSE_SECONDS)
 
     async def async_set_volume_level(self, volume):
         self._hub.set_analog(self._volume_join, int(volume * 65535))
 
     async def async_select_source(self, source):
+        self._select_source(source)
+
+    def _select_source(self, source):
+        """Select a source by analog number or by pulsing its digital join"""
         selector = self._source_selector_by_name.get(source)
         if selector is None:
             _LOGGER.warning("%s: unknown source %s", self._name, source)
@@ -243,17 +239,24 @@ class CrestronRoom(MediaPlayerEntity):
         if self._source_number_join is not None:
             self._hub.set_analog(self._source_number_join, selector)
         else:
-            await self._async_pulse_digital(selector)
+            self._hub.pulse_digital(selector, PULSE_SECONDS)
 
     async def async_turn_off(self):
-        await self._async_pulse_digital(self._power_off_join)
+        self._hub.pulse_digital(self._power_off_join, PULSE_SECONDS)
 
         if self._source_number_join is not None:
-            await sleep(PULSE_SECONDS)
-            self._hub.set_analog(self._source_number_join, 0)
+            # Clear the source once the power off press has been released
+            self.hass.loop.call_later(
+                2 * PULSE_SECONDS, self._hub.set_analog, self._source_number_join, 0
+            )
 
     async def async_turn_on(self):
-        await self._async_pulse_digital(self._power_on_join)
+        self._hub.pulse_digital(self._power_on_join, PULSE_SECONDS)
 
         if self._default_source is not None:
-            await self.async_select_source(self._sources[self._default_source])
+            # Select the default source once the power on press has been released
+            self.hass.loop.call_later(
+                2 * PULSE_SECONDS,
+                self._select_source,
+                self._sources[self._default_source],
+            )
@@ -3,17 +3,19 @@
 import voluptuous as vol
 import logging
 
-from homeassistant.helpers.entity import Entity
 from homeassistant.const import CONF_NAME, CONF_DEVICE_CLASS, CONF_UNIT_OF_MEASUREMENT
 import homeassistant.helpers.config_validation as cv
 
-from .const import HUB, DOMAIN, CONF_VALUE_JOIN, CONF_DIVISOR
+from . import get_endpoint
+from .const import DEFAULT_ENDPOINT, CONF_ENDPOINT, CONF_VALUE_JOIN, CONF_DIVISOR
+from .entity import CrestronEntity
 
 _LOGGER = logging.getLogger(__name__)
 
 PLATFORM_SCHEMA = vol.Schema(
     {
         vol.Required(CONF_NAME): cv.string,
+        vol.Optional(CONF_ENDPOINT): cv.string,
         vol.Required(CONF_VALUE_JOIN): cv.positive_int,           
         vol.Required(CONF_DEVICE_CLASS): cv.string,
         vol.Required(CONF_UNIT_OF_MEASUREMENT): cv.string,
@@ -26,32 +28,22 @@ async def async_setup_platform(hass, config, async_add_entities, discovery_info=
     if not config or len(config) <= 1:
         return
 
-    hub = hass.data[DOMAIN][HUB]
+    hub = get_endpoint(hass, config.get(CONF_ENDPOINT, DEFAULT_ENDPOINT))
     entity = [CrestronSensor(hub, config)]
     async_add_entities(entity)
 
 
-class CrestronSensor(Entity):
+class CrestronSensor(CrestronEntity):
     def __init__(self, hub, config):
-        self._hub = hub
         self._name = config.get(CONF_NAME)
         self._join = config.get(CONF_VALUE_JOIN)
         self._device_class = config.get(CONF_DEVICE_CLASS)
         self._unit_of_measurement = config.get(CONF_UNIT_OF_MEASUREMENT)
         self._divisor = config.get(CONF_DIVISOR, 1)
+        super().__init__(hub, [("a", self._join)])
 
-    async def async_added_to_hass(self):
-        self._hub.register_callback(self.process_callback)
-
-    async def async_will_remove_from_hass(self):
-        self._hub.remove_callback(self.process_callback)
-
-    async def process_callback(self, cbtype, value):
-        self.async_write_ha_state()
-
-    @property
-    def available(self):
-        return self._hub.is_available()
+    def _derived_state(self):
+        return self.state
 
     @property
     def name(self):
@@ -63,7 +55,7 @@ class CrestronSensor(Entity):
 
     @property
     def state(self):
-        return self._hub.get_analog(self._join) / self._divisor
+        return self._analogs[self._join] / self._divisor
 
     @property
     def device_class(self):
@@ -0,0 +1,46 @@
+"""Traffic counters for a Crestron XSIG endpoint"""
+
+
+class XsigStats:
+    """Plain integer counters that are cheap enough to keep on in production"""
+
+    __slots__ = (
+        "digital_in",
+        "analog_in",
+        "serial_in",
+        "digital_out",
+        "analog_out",
+        "serial_out",
+        "bytes_in",
+        "bytes_out",
+        "unchanged_in",
+        "unknown_packets",
+        "connections",
+        "syncs",
+        "dispatches",
+        "process_ns",
+    )
+
+    def __init__(self):
+        """Initialize XsigStats object"""
+        self.reset()
+
+    def reset(self):
+        """Set every counter to zero"""
+        for name in self.__slots__:
+            setattr(self, name, 0)
+
+    def as_dict(self):
+        """Return the counters, plus the mean processing time per inbound frame"""
+        stats = {name: getattr(self, name) for name in self.__slots__}
+        frames = (
+            self.digital_in
+            + self.analog_in
+            + self.serial_in
+            + self.syncs
+            + self.unknown_packets
+        )
+        stats["process_mean_us"] = (
+            round(self.process_ns / frames / 1000, 3) if frames else 0.0
+        )
+        return stats
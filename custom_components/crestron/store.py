@@ -0,0 +1,139 @@
+"""Compact join value storage for the Crestron XSIG symbol"""
+
+from array import array
+import base64
+import sys
+
+# Join numbers that fit in the XSIG frame headers
+MAX_DIGITAL_JOIN = 4096
+MAX_ANALOG_JOIN = 1024
+MAX_SERIAL_JOIN = 1024
+
+
+class JoinStore:
+    """Dense, array-backed tables of the current join values
+
+    Digitals are packed into a bit array, analogs into an unsigned 16-bit
+    array and serials into a list that holds "" for unset joins.  Index 0 is
+    unused so join numbers can be used directly.
+    """
+
+    def __init__(self):
+        """Initialize JoinStore object"""
+        self._digital = bytearray((MAX_DIGITAL_JOIN >> 3) + 1)
+        self._analog = array("H", bytes(2 * (MAX_ANALOG_JOIN + 1)))
+        self._serial = [""] * (MAX_SERIAL_JOIN + 1)
+
+    def get_digital(self, join):
+        """Return digital value for join"""
+        if 0 < join <= MAX_DIGITAL_JOIN:
+            return bool(self._digital[join >> 3] >> (join & 7) & 1)
+        return False
+
+    def get_analog(self, join):
+        """Return analog value for join"""
+        if 0 < join <= MAX_ANALOG_JOIN:
+            return self._analog[join]
+        return 0
+
+    def get_serial(self, join):
+        """Return serial value for join"""
+        if 0 < join <= MAX_SERIAL_JOIN:
+            return self._serial[join]
+        return ""
+
+    def set_digital(self, join, value):
+        """Store digital value for join and return True if it changed"""
+        index = join >> 3
+        mask = 1 << (join & 7)
+        current = self._digital[index]
+        if value:
+            self._digital[index] = current | mask
+        else:
+            self._digital[index] = current & ~mask
+        return self._digital[index] != current
+
+    def set_analog(self, join, value):
+        """Store analog value for join and return True if it changed"""
+        if self._analog[join] == value:
+            return False
+        self._analog[join] = value
+        return True
+
+    def set_serial(self, join, value):
+        """Store serial value for join and return True if it changed"""
+        if self._serial[join] == value:
+            return False
+        self._serial[join] = value
+        return True
+
+    def get_digitals(self, joins):
+        """Return a list of digital values for an iterable or range of joins"""
+        digital = self._digital
+        return [
+            bool(digital[join >> 3] >> (join & 7) & 1)
+            if 0 < join <= MAX_DIGITAL_JOIN
+            else False
+            for join in joins
+        ]
+
+    def get_analogs(self, joins):
+        """Return a list of analog values for an iterable or range of joins"""
+        if _in_bounds(joins, MAX_ANALOG_JOIN):
+            return self._analog[joins.start : joins.stop : joins.step].tolist()
+        return [self.get_analog(join) for join in joins]
+
+    def get_serials(self, joins):
+        """Return a list of serial values for an iterable or range of joins"""
+        if _in_bounds(joins, MAX_SERIAL_JOIN):
+            return self._serial[joins.start : joins.stop : joins.step]
+        return [self.get_serial(join) for join in joins]
+
+    def snapshot(self):
+        """Return a copy of the digital, analog and serial tables"""
+        return bytes(self._digital), array("H", self._analog), list(self._serial)
+
+    def dump(self):
+        """Return the tables in a compact JSON-serializable form
+
+        Digitals and analogs (little-endian) are base64 encoded; only
+        serials that are set are included.
+        """
+        analog = array("H", self._analog)
+        if sys.byteorder == "big":
+            analog.byteswap()
+        return {
+            "digital": base64.b64encode(self._digital).decode(),
+            "analog": base64.b64encode(analog.tobytes()).decode(),
+            "serial": {
+                str(join): value for join, value in enumerate(self._serial) if value
+            },
+        }
+
+    def load(self, data):
+        """Replace the tables with ones returned by dump()"""
+        digital = base64.b64decode(data["digital"])
+        analog = array("H")
+        analog.frombytes(base64.b64decode(data["analog"]))
+        if sys.byteorder == "big":
+            analog.byteswap()
+        if len(digital) != len(self._digital) or len(analog) != len(self._analog):
+            raise ValueError("Join table sizes do not match")
+        serial = [""] * (MAX_SERIAL_JOIN + 1)
+        for join, value in data["serial"].items():
+            join = int(join)
+            if 0 < join <= MAX_SERIAL_JOIN:
+                serial[join] = value
+        self._digital[:] = digital
+        self._analog = analog
+        self._serial = serial
+
+
+def _in_bounds(joins, max_join):
+    """Return True if joins is an ascending range that can be sliced directly"""
+    return (
+        isinstance(joins, range)
+        and joins.step > 0
+        and joins.start > 0
+        and joins.stop <= max_join + 1
+    )
@@ -2,18 +2,20 @@
 
 import voluptuous as vol
 import logging
-from asyncio import sleep
 
 import homeassistant.helpers.config_validation as cv
 from homeassistant.components.switch import SwitchEntity
 from homeassistant.const import STATE_ON, STATE_OFF, CONF_NAME, CONF_DEVICE_CLASS
-from .const import HUB, DOMAIN, CONF_SWITCH_JOIN, CONF_PULSED
+from . import get_endpoint
+from .const import DEFAULT_ENDPOINT, CONF_ENDPOINT, CONF_SWITCH_JOIN, CONF_PULSED
+from .entity import CrestronEntity
 
 _LOGGER = logging.getLogger(__name__)
 
 PLATFORM_SCHEMA = vol.Schema(
     {
         vol.Required(CONF_NAME): cv.string,
+        vol.Optional(CONF_ENDPOINT): cv.string,
         vol.Optional(CONF_DEVICE_CLASS): cv.string,
         vol.Required(CONF_SWITCH_JOIN): cv.positive_int,
         vol.Required(CONF_PULSED): cv.boolean,
@@ -26,31 +28,21 @@ async def async_setup_platform(hass, config, async_add_entities, discovery_info=
     if not config or len(config) <= 1:
         return
 
-    hub = hass.data[DOMAIN][HUB]
+    hub = get_endpoint(hass, config.get(CONF_ENDPOINT, DEFAULT_ENDPOINT))
     entity = [CrestronSwitch(hub, config)]
     async_add_entities(entity)
 
 
-class CrestronSwitch(SwitchEntity):
+class CrestronSwitch(CrestronEntity, SwitchEntity):
     def __init__(self, hub, config):
-        self._hub = hub
         self._name = config.get(CONF_NAME)
         self._switch_join = config.get(CONF_SWITCH_JOIN)
         self._device_class = config.get(CONF_DEVICE_CLASS, "switch")
         self._pulsed = config.get(CONF_PULSED)
+        super().__init__(hub, [("d", self._switch_join)])
 
-    async def async_added_to_hass(self):
-        self._hub.register_callback(self.process_callback)
-
-    async def async_will_remove_from_hass(self):
-        self._hub.remove_callback(self.process_callback)
-
-    async def process_callback(self, cbtype, value):
-        self.async_write_ha_state()
-
-    @property
-    def available(self):
-        return self._hub.is_available()
+    def _derived_state(self):
+        return self.is_on
 
     @property
     def name(self):
@@ -66,27 +58,23 @@ class CrestronSwitch(SwitchEntity):
 
     @property
     def state(self):
-        if self._hub.get_digital(self._switch_join):
+        if self._digitals[self._switch_join]:
             return STATE_ON
         else:
             return STATE_OFF
 
     @property
     def is_on(self):
-        return self._hub.get_digital(self._switch_join)
+        return self._digitals[self._switch_join]
 
     async def async_turn_on(self, **kwargs):
         if self._pulsed:
-            self._hub.set_digital(self._switch_join, True)
-            await sleep(0.05)
-            self._hub.set_digital(self._switch_join, False)
+            self._hub.pulse_digital(self._switch_join)
         else:
             self._hub.set_digital(self._switch_join, True)
 
     async def async_turn_off(self, **kwargs):
         if self._pulsed:
-            self._hub.set_digital(self._switch_join, True)
-            await sleep(0.05)
-            self._hub.set_digital(self._switch_join, False)
+            self._hub.pulse_digital(self._switch_join)
         else:
             self._hub.set_digital(self._switch_join, False)
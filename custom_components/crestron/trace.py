@@ -0,0 +1,109 @@
+"""In-memory trace of the most recent XSIG frames"""
+
+from array import array
+import time
+
+from .capture import INBOUND, OUTBOUND
+
+DEFAULT_TRACE_SIZE = 256
+
+
+class _Ring:
+    """Fixed-size ring of (time, type, join, value) records in parallel arrays"""
+
+    __slots__ = ("times", "types", "joins", "values", "pos", "count")
+
+    def __init__(self, size):
+        """Initialize _Ring object with every slot allocated up front"""
+        self.times = array("d", bytes(8 * size))
+        self.types = [None] * size
+        self.joins = array("H", bytes(2 * size))
+        self.values = [None] * size
+        self.pos = 0
+        self.count = 0
+
+    def clear(self):
+        """Forget every record"""
+        self.types[:] = [None] * len(self.types)
+        self.values[:] = [None] * len(self.values)
+        self.pos = 0
+        self.count = 0
+
+    def records(self):
+        """Return the stored records, oldest first"""
+        size = len(self.types)
+        first = (self.pos - self.count) % size
+        records = []
+        for index in range(first, first + self.count):
+            index %= size
+            value = self.values[index]
+            if isinstance(value, (bytes, bytearray)):
+                value = value.hex()
+            records.append(
+                {
+                    "time": self.times[index],
+                    "type": self.types[index],
+                    "join": self.joins[index] or None,
+                    "value": value,
+                }
+            )
+        return records
+
+
+class FrameTrace:
+    """Keeps the last size frames received and sent by an endpoint
+
+    Recording a frame overwrites preallocated slots, so the trace can stay
+    on in production at the cost of a few assignments per frame.
+    """
+
+    def __init__(self, size=DEFAULT_TRACE_SIZE):
+        """Initialize FrameTrace object"""
+        self.size = size
+        self._rings = (_Ring(size), _Ring(size))
+
+    def record(self, direction, frame_type, join, value):
+        """Store one frame; join is None for frames without a join"""
+        ring = self._rings[direction]
+        pos = ring.pos
+        ring.times[pos] = time.time()
+        ring.types[pos] = frame_type
+        ring.joins[pos] = join or 0
+        ring.values[pos] = value
+        pos += 1
+        ring.pos = 0 if pos == self.size else pos
+        if ring.count < self.size:
+            ring.count += 1
+
+    def record_frames(self, direction, frames):
+        """Store a list of (type, join, value) frames that arrived together"""
+        ring = self._rings[direction]
+        size = self.size
+        # Only the last size frames would survive
+        if len(frames) > size:
+            frames = frames[-size:]
+        now = time.time()
+        times, types, joins, values = ring.times, ring.types, ring.joins, ring.values
+        pos = ring.pos
+        for frame_type, join, value in frames:
+            times[pos] = now
+            types[pos] = frame_type
+            joins[pos] = join or 0
+            values[pos] = value
+            pos += 1
+            if pos == size:
+                pos = 0
+        ring.pos = pos
+        ring.count = min(ring.count + len(frames), size)
+
+    def clear(self):
+        """Forget every recorded frame"""
+        for ring in self._rings:
+            ring.clear()
+
+    def dump(self):
+        """Return the recorded frames of each direction, oldest first"""
+        return {
+            "inbound": self._rings[INBOUND].records(),
+            "outbound": self._rings[OUTBOUND].records(),
+        }
@@ -0,0 +1,95 @@
+"""Tests for the XSIG frame decoder
+
+codec has no Home Assistant dependencies, so it is loaded straight from its
+file without importing the integration package.
+"""
+
+import importlib.util
+import pathlib
+
+CODEC_PATH = (
+    pathlib.Path(__file__).resolve().parent.parent
+    / "custom_components"
+    / "crestron"
+    / "codec.py"
+)
+
+_spec = importlib.util.spec_from_file_location("crestron_codec", CODEC_PATH)
+codec = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(codec)
+
+DIGITAL = bytes(codec.encode_digital(6, True))
+ANALOG = bytes(codec.encode_analog(3, 40000))
+SERIAL = bytes(codec.encode_serial(2, "hello"))
+
+
+def decode(data):
+    """Return the frames decoded from data and the offset decoding stopped at"""
+    frames = []
+    return frames, codec.decode_into(data, frames)
+
+
+def test_frames_round_trip():
+    frames, end = decode(DIGITAL + ANALOG + SERIAL)
+    assert frames == [
+        (codec.FRAME_DIGITAL, 6, 1),
+        (codec.FRAME_ANALOG, 3, 40000),
+        (codec.FRAME_SERIAL, 2, "hello"),
+    ]
+    assert end == len(DIGITAL + ANALOG + SERIAL)
+
+
+def test_partial_frame_split_across_chunks():
+    data = DIGITAL + ANALOG + SERIAL
+    expected, _ = decode(data)
+    for split in range(1, len(data)):
+        parser = codec.XsigParser()
+        assert parser.feed(data[:split]) + parser.feed(data[split:]) == expected
+
+
+def test_partial_frames_are_kept():
+    for partial in (DIGITAL[:1], ANALOG[:3], SERIAL[:-1]):
+        assert decode(partial) == ([], 0)
+
+
+def test_overlong_serial_without_terminator_is_skipped():
+    header = SERIAL[:2]
+    payload = b"a" * (codec.MAX_SERIAL_PAYLOAD + 1)
+    frames, end = decode(header + payload + DIGITAL)
+    assert frames == [
+        (codec.FRAME_UNKNOWN, None, header + payload),
+        (codec.FRAME_DIGITAL, 6, 1),
+    ]
+    assert end == len(header + payload + DIGITAL)
+
+
+def test_serial_within_bound_waits_for_terminator():
+    data = SERIAL[:2] + b"a" * codec.MAX_SERIAL_PAYLOAD
+    assert decode(data) == ([], 0)
+
+
+def test_garbage_before_valid_header():
+    frames, end = decode(b"\xff\xfe\x7f" + ANALOG)
+    assert frames == [
+        (codec.FRAME_UNKNOWN, None, b"\xff\xfe\x7f"),
+        (codec.FRAME_ANALOG, 3, 40000),
+    ]
+    assert end == len(ANALOG) + 3
+
+
+def test_garbage_keeps_last_byte():
+    parser = codec.XsigParser()
+    # The trailing header byte may start a frame completed by the next chunk
+    assert parser.feed(b"\xff\xff" + DIGITAL[:1]) == [
+        (codec.FRAME_UNKNOWN, None, b"\xff\xff")
+    ]
+    assert parser.feed(DIGITAL[1:]) == [(codec.FRAME_DIGITAL, 6, 1)]
+
+
+def test_trailing_sync():
+    frames, end = decode(DIGITAL + b"\xfb")
+    assert frames == [
+        (codec.FRAME_DIGITAL, 6, 1),
+        (codec.FRAME_SYNC, None, None),
+    ]
+    assert end == len(DIGITAL) + 1